@@ -2,14 +2,72 @@
 程序入口 - 支持命令行参数和交互式配置
 """
 
+import os
 import sys
-import argparse
-from .game import GomokuGame
-from .config import interactive_config, get_config_file, delete_config_file
+
+from . import __version__
+
+
+def _show_config():
+    """显示当前配置信息"""
+    from .config import load_config_from_file, get_config_file
+    config = load_config_from_file()
+    print(f"\n配置文件: {get_config_file()}")
+    if config:
+        print("\n当前配置:")
+        print(f"  提供商: {config.get('provider', '未设置')}")
+        print(f"  模型: {config.get('model', '未设置')}")
+        print(f"  端点: {config.get('endpoint') or '默认'}")
+        print(f"  API密钥: {'已设置 (' + config.get('api_key', '')[:8] + '...)' if config.get('api_key') else '未设置'}")
+        print(f"  超时: {config.get('timeout', 30)}秒")
+    else:
+        print("\n未找到配置文件，将使用传统AI。")
+        print("运行 'gomoku --config' 进行配置。")
+
+
+def _reset_config():
+    """重置配置（删除配置文件）"""
+    from .config import delete_config_file
+    if delete_config_file():
+        print("✅ 配置已重置，将使用传统AI。")
+    else:
+        print("⚠️ 重置失败")
+
+
+def _dispatch_fast_path(argv) -> bool:
+    """
+    直接处理单独出现的简单命令，无需构建 argparse 解析器
+    
+    Args:
+        argv: 命令行参数（不含程序名）
+        
+    Returns:
+        是否已处理该命令
+    """
+    if len(argv) != 1:
+        return False
+    
+    command = argv[0]
+    if command in ('-v', '--version'):
+        print(f"{os.path.basename(sys.argv[0])} {__version__}")
+    elif command == '--config':
+        from .config import interactive_config
+        interactive_config()
+    elif command == '--show-config':
+        _show_config()
+    elif command == '--reset-config':
+        _reset_config()
+    else:
+        return False
+    return True
 
 
 def main():
     """主函数"""
+    if _dispatch_fast_path(sys.argv[1:]):
+        return
+    
+    import argparse
     parser = argparse.ArgumentParser(
         description='终端五子棋 - 人机对战游戏',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -43,7 +101,7 @@ AI服务配置:
     parser.add_argument(
         '-v', '--version',
         action='version',
-        version='%(prog)s 1.0.1'
+        version=f'%(prog)s {__version__}'
     )
     
     parser.add_argument(
@@ -82,35 +140,22 @@ AI服务配置:
     
     args = parser.parse_args()
     
-    # 处理配置相关命令
+    # 处理配置相关命令（按需导入，避免只查看配置时也加载游戏模块）
     if args.config:
+        from .config import interactive_config
         interactive_config()
         return
     
     if args.show_config:
-        from .config import load_config_from_file, get_config_file
-        config = load_config_from_file()
-        print(f"\n配置文件: {get_config_file()}")
-        if config:
-            print("\n当前配置:")
-            print(f"  提供商: {config.get('provider', '未设置')}")
-            print(f"  模型: {config.get('model', '未设置')}")
-            print(f"  端点: {config.get('endpoint') or '默认'}")
-            print(f"  API密钥: {'已设置 (' + config.get('api_key', '')[:8] + '...)' if config.get('api_key') else '未设置'}")
-            print(f"  超时: {config.get('timeout', 30)}秒")
-        else:
-            print("\n未找到配置文件，将使用传统AI。")
-            print("运行 'gomoku --config' 进行配置。")
+        _show_config()
         return
     
     if args.reset_config:
-        if delete_config_file():
-            print("✅ 配置已重置，将使用传统AI。")
-        else:
-            print("⚠️ 重置失败")
+        _reset_config()
         return
     
-    # 创建并运行游戏
+    # 创建并运行游戏（curses、AI提供商等仅在真正开始游戏时加载）
+    from .game import GomokuGame
     try:
         game = GomokuGame(
             difficulty=args.difficulty,
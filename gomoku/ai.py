@@ -18,6 +18,12 @@ class GomokuAI:
     SCORE_LIVE_TWO = 100     # 活二
     SCORE_SLEEP_TWO = 10     # 眠二
     
+    # 置换表条目类型
+    TT_EXACT = 0  # 精确值
+    TT_LOWER = 1  # 下界（发生 beta 剪枝）
+    TT_UPPER = 2  # 上界（没有超过 alpha）
+    TT_MAX_ENTRIES = 200000  # 超过后清空，避免长对局内存无限增长
+    
     def __init__(self, difficulty="medium"):
         """
         初始化AI
@@ -26,6 +32,9 @@ class GomokuAI:
             difficulty: 难度级别 easy/medium/hard
         """
         self.difficulty = difficulty.lower()
+        # 置换表: (局面哈希, 是否极大层, 己方) -> (评分, 剩余深度, 条目类型)
+        # 以 Board.hash 为键，跨回合保留，不同走子顺序到达的同一局面可直接复用
+        self.tt = {}
         
     def get_move(self, board, player) -> Optional[Tuple[int, int]]:
         """
@@ -184,8 +193,7 @@ class GomokuAI:
             score = self._minimax(board, depth - 1, float('-inf'), float('inf'), False, player, opponent)
             
             # 撤销落子
-            board.board[row][col] = board.EMPTY
-            board.move_count -= 1
+            board.undo()
             
             if score > best_score:
                 best_score = score
@@ -194,10 +202,29 @@ class GomokuAI:
         return best_move
     
     def _minimax(self, board, depth, alpha, beta, is_maximizing, player, opponent):
-        """Minimax算法与Alpha-Beta剪枝"""
+        """Minimax算法与Alpha-Beta剪枝（带置换表）"""
+        tt = self.tt
+        key = (board.hash, is_maximizing, player)
+        entry = tt.get(key)
+        if entry is not None and entry[1] == depth:
+            value, _, flag = entry
+            if flag == self.TT_EXACT:
+                return value
+            if flag == self.TT_LOWER:
+                alpha = max(alpha, value)
+            else:
+                beta = min(beta, value)
+            if beta <= alpha:
+                return value
+        
         # 终止条件
         if depth == 0:
-            return self._evaluate_board(board, player, opponent)
+            value = self._evaluate_board(board, player, opponent)
+            self._tt_store(key, value, depth, self.TT_EXACT)
+            return value
+        
+        # 记录搜索窗口，用于判断结果是精确值还是边界
+        window_alpha, window_beta = alpha, beta
         
         candidates = board.get_nearby_positions(distance=2)
         if not candidates or len(candidates) > 15:
@@ -209,38 +236,52 @@ class GomokuAI:
                 board.place_stone(row, col, player)
                 
                 if board.check_win(row, col):
-                    board.board[row][col] = board.EMPTY
-                    board.move_count -= 1
+                    board.undo()
+                    self._tt_store(key, self.SCORE_FIVE, depth, self.TT_EXACT)
                     return self.SCORE_FIVE
                 
                 eval_score = self._minimax(board, depth - 1, alpha, beta, False, player, opponent)
-                board.board[row][col] = board.EMPTY
-                board.move_count -= 1
+                board.undo()
                 
                 max_eval = max(max_eval, eval_score)
                 alpha = max(alpha, eval_score)
                 if beta <= alpha:
                     break
-            return max_eval
+            value = max_eval
         else:
             min_eval = float('inf')
             for row, col in candidates:
                 board.place_stone(row, col, opponent)
                 
                 if board.check_win(row, col):
-                    board.board[row][col] = board.EMPTY
-                    board.move_count -= 1
+                    board.undo()
+                    self._tt_store(key, -self.SCORE_FIVE, depth, self.TT_EXACT)
                     return -self.SCORE_FIVE
                 
                 eval_score = self._minimax(board, depth - 1, alpha, beta, True, player, opponent)
-                board.board[row][col] = board.EMPTY
-                board.move_count -= 1
+                board.undo()
                 
                 min_eval = min(min_eval, eval_score)
                 beta = min(beta, eval_score)
                 if beta <= alpha:
                     break
-            return min_eval
+            value = min_eval
+        
+        if value <= window_alpha:
+            flag = self.TT_UPPER
+        elif value >= window_beta:
+            flag = self.TT_LOWER
+        else:
+            flag = self.TT_EXACT
+        self._tt_store(key, value, depth, flag)
+        return value
+    
+    def _tt_store(self, key, value, depth, flag):
+        """写入置换表，表满时整体清空"""
+        tt = self.tt
+        if len(tt) >= self.TT_MAX_ENTRIES:
+            tt.clear()
+        tt[key] = (value, depth, flag)
     
     def _evaluate_board(self, board, player, opponent):
         """评估整个棋盘局面"""
@@ -334,12 +375,10 @@ class GomokuAI:
         
         for row, col in candidates:
             board.place_stone(row, col, player)
-            if board.check_win(row, col):
-                board.board[row][col] = board.EMPTY
-                board.move_count -= 1
+            won = board.check_win(row, col)
+            board.undo()
+            if won:
                 return (row, col)
-            board.board[row][col] = board.EMPTY
-            board.move_count -= 1
         
         return None
     
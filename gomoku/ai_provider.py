@@ -4,12 +4,130 @@ AI服务提供商抽象层
 定义AI服务的统一接口，支持多种AI提供商实现
 """
 
+import functools
+import random
+import re
+import time
 from abc import ABC, abstractmethod
+from array import array
 from dataclasses import dataclass
-from typing import Optional, List, Tuple
+from itertools import islice
+from typing import Callable, Dict, Optional, List, Tuple, Union
 from enum import Enum
 
 
+# 棋盘数据：二维列表，或按行展开的扁平字节序列（长度 board_size * board_size）
+BoardData = Union[List[List[int]], bytes, bytearray, memoryview, array]
+
+# 与 BoardData 中的扁平类型保持一致，供 isinstance 判断
+_FLAT_BOARD_TYPES = (bytes, bytearray, memoryview, array)
+
+# 聊天历史的一条：ChatMessage，或已转换好的API消息 {"role": ..., "content": ...}
+ChatHistoryItem = Union["ChatMessage", Dict[str, str]]
+
+
+# MOVE: 格式的落子行（取 MOVE: 之后的整行内容，由 position_to_coords 校验，支持大小写）
+# 以及所有以 MOVE 开头的行
+_MOVE_RE = re.compile(r'^[^\S\n]*MOVE:(.*)$', re.IGNORECASE | re.MULTILINE)
+_MOVE_LINE_RE = re.compile(r'^[^\S\n]*MOVE.*$', re.IGNORECASE | re.MULTILINE)
+
+# 备用落子格式：标准坐标（如 H8, M13, A1，支持A-Y）和 (row, col)
+_ALT_COORD_RE = re.compile(r'\b([A-Ya-y])(\d{1,2})\b')
+_ALT_TUPLE_RE = re.compile(r'\((\d{1,2})\s*,\s*(\d{1,2})\)')
+
+
+# 落子提示词模板，只有少数字段随每次调用变化
+_MOVE_PROMPT_TEMPLATE = """你是一个正在和用户下五子棋的AI，你执{player_symbol}。
+
+## 游戏规则
+1. 棋盘大小为 {board_size}x{board_size}
+2. 先连成五子（横、竖、斜）的一方获胜
+3. 黑棋先手（用户），你是白棋
+
+## 当前棋盘状态
+坐标系统：列用字母A-T表示，行用数字1-20表示
+例如：A1表示左上角，J10表示中心位置
+
+{board_text}
+
+## 落子历史（最近10步）
+{history_text}
+{user_instruction_text}{suggestion_text}
+## 你的任务
+1. 如果用户有指令，优先遵循用户指令
+2. 否则可以参考算法建议，或根据自己判断选择落子位置
+3. 简要分析你的落子策略
+
+**重要：你的回复必须包含以下格式的落子位置：**
+MOVE: <列字母><行数字>
+
+例如：MOVE: J10 或 MOVE: H8
+
+请给出你的落子："""
+
+_SUGGESTION_TEMPLATE = """
+## 算法建议
+传统五子棋算法分析认为最优落子位置是：{position}
+这个建议基于棋盘评估和搜索算法，仅供参考。你可以采纳，也可以根据自己的判断选择其他位置。
+"""
+
+_USER_INSTRUCTION_TEMPLATE = """
+## 用户指令（最高优先级）
+用户要求你下在：{instruction}
+请优先遵循用户的指令。
+"""
+
+# AI执子符号，按 current_player == 1 索引
+_MOVE_PLAYER_SYMBOLS = ("○(白棋)", "●(黑棋)")
+
+# 聊天系统提示词
+_CHAT_BASE_PROMPT = """你是一个正在和用户下五子棋的AI对手，你执白棋(○)，用户执黑棋(●)。
+
+你可以：
+1. 讨论你的落子策略和思考过程
+2. 分析当前局势和对手的走法
+3. 回答用户关于五子棋的任何问题
+4. 进行友好的对战交流
+
+注意：
+- 你是白棋选手，记住你下过的每一步棋
+- 如果用户询问你为什么这样下，要解释你的策略
+- 回复请控制在100字以内，保持简洁"""
+
+_CHAT_BOARD_TEMPLATE = """
+
+## 当前棋盘状态（{player_str}回合）
+{board_text}"""
+
+_CHAT_HISTORY_TEMPLATE = """
+
+## 落子历史（最近10步）
+{history_text}"""
+
+_CHAT_PLAYER_NAMES = {1: "黑棋(用户)", 2: "白棋(你)"}
+
+
+def retry_delay(attempt: int) -> float:
+    """
+    第 attempt 次（从0开始）请求失败后，重试前的等待时间（秒）
+    
+    指数退避并加少量随机抖动，避免限流时集中重试，最长8秒
+    """
+    return min(2 ** attempt + random.uniform(0, 0.25), 8.0)
+
+
+def request_timeout(timeout: float, deadline: Optional[float]) -> float:
+    """
+    单次请求可用的超时时间（秒）
+    
+    不超过配置的 timeout，也不越过整体截止时间 deadline（time.monotonic() 时刻，None 表示不限）；
+    返回值 <= 0 表示已经没有时间再发请求
+    """
+    if deadline is None:
+        return timeout
+    return min(timeout, deadline - time.monotonic())
+
+
 class MoveResult(Enum):
     """落子结果枚举"""
     SUCCESS = "success"
@@ -54,19 +172,28 @@ class AIProvider(ABC):
     @abstractmethod
     def get_move(
         self,
-        board: List[List[int]],
+        board: BoardData,
         current_player: int,
         history: List[Tuple[int, int, int]],
-        board_size: int = 15
+        board_size: int = 20,
+        suggested_move: Optional[Tuple[int, int]] = None,
+        user_instruction: Optional[str] = None,
+        prerendered_board: Optional[List[str]] = None,
+        deadline: Optional[float] = None
     ) -> AIMove:
         """
         获取AI的下一步落子位置
         
         Args:
-            board: 棋盘状态，二维数组，0=空，1=黑棋，2=白棋
+            board: 棋盘状态，二维数组或扁平字节序列，0=空，1=黑棋，2=白棋
             current_player: 当前玩家（1=黑棋，2=白棋）
             history: 落子历史 [(row, col, player), ...]
-            board_size: 棋盘大小，默认15
+            board_size: 棋盘大小，默认20
+            suggested_move: 传统AI建议的落子位置 (row, col)（可选）
+            user_instruction: 用户的落子指令（可选）
+            prerendered_board: 预渲染的棋盘行（可选），见 PromptBuilder.render_board_rows
+            deadline: 整体截止时间（time.monotonic() 时刻，可选），过了之后不再重试，
+                单次请求的超时也不会越过它
             
         Returns:
             AIMove: 包含落子位置和结果的响应对象
@@ -77,21 +204,29 @@ class AIProvider(ABC):
     def chat(
         self,
         message: str,
-        chat_history: List[ChatMessage],
-        board: Optional[List[List[int]]] = None,
-        current_player: Optional[int] = None
+        chat_history: List[ChatHistoryItem],
+        board: Optional[BoardData] = None,
+        current_player: Optional[int] = None,
+        board_history: Optional[List[Tuple[int, int, int]]] = None,
+        prerendered_board: Optional[List[str]] = None,
+        on_token: Optional[Callable[[str], None]] = None
     ) -> ChatResponse:
         """
         与AI进行对话
         
         Args:
             message: 用户消息
-            chat_history: 聊天历史
+            chat_history: 聊天历史，ChatMessage 或 ChatManager.api_messages_excluding_last
+                返回的API消息字典
             board: 当前棋盘状态（可选，用于上下文）
             current_player: 当前玩家（可选）
+            board_history: 落子历史（可选）
+            prerendered_board: 预渲染的棋盘行（可选）
+            on_token: 流式回复回调（可选），提供时以流式方式请求，
+                每收到一段回复文本就在请求线程中调用一次
             
         Returns:
-            ChatResponse: AI的回复
+            ChatResponse: AI的回复（完整内容）
         """
         pass
     
@@ -110,6 +245,43 @@ class AIProvider(ABC):
     def provider_name(self) -> str:
         """获取提供商名称"""
         pass
+    
+    # 上一次的聊天系统提示词 (局面键, 提示词)，局面不变时直接复用；
+    # 首次赋值后成为实例属性
+    _chat_prompt_cache: Optional[Tuple[tuple, str]] = None
+    
+    def _chat_system_prompt(
+        self,
+        board: Optional[BoardData],
+        current_player: Optional[int],
+        board_history: Optional[List[Tuple[int, int, int]]],
+        prerendered_board: Optional[List[str]]
+    ) -> str:
+        """
+        构建聊天系统提示词，与上一次局面相同时复用上次的结果
+        
+        键和提示词作为一个元组整体读写，多个聊天线程同时调用时也不会配错
+        """
+        if prerendered_board is not None:
+            board_key = tuple(prerendered_board)
+        elif board is not None:
+            board_key = PromptBuilder.flatten_board(board, 20)
+        else:
+            board_key = None
+        key = (board_key, current_player, tuple(board_history[-10:]) if board_history else ())
+        
+        cache = self._chat_prompt_cache
+        if cache is not None and cache[0] == key:
+            return cache[1]
+        prompt = PromptBuilder.build_chat_prompt(
+            board=board,
+            current_player=current_player,
+            history=board_history,
+            board_size=20,
+            prerendered_board=prerendered_board
+        )
+        self._chat_prompt_cache = (key, prompt)
+        return prompt
 
 
 class PromptBuilder:
@@ -121,16 +293,23 @@ class PromptBuilder:
     
     # 列标签（A-T，支持20x20棋盘）
     COL_LABELS = "ABCDEFGHIJKLMNOPQRST"
+    _COL_INDEX = {c: i for i, c in enumerate(COL_LABELS)}
+    
+    # 棋子符号，按格子取值索引：0=空，1=黑棋，2=白棋
+    _CELL = ("·", "●", "○")
+    # 格子字节 -> "符号 " 的 str.translate 表，一次 C 层遍历渲染整行/整盘
+    _CELL_TRANSLATION = {value: symbol + " " for value, symbol in enumerate(_CELL)}
     
     @classmethod
     def build_move_prompt(
         cls,
-        board: List[List[int]],
+        board: BoardData,
         current_player: int,
         history: List[Tuple[int, int, int]],
         board_size: int = 20,
         suggested_move: Optional[Tuple[int, int]] = None,
-        user_instruction: Optional[str] = None
+        user_instruction: Optional[str] = None,
+        prerendered_board: Optional[List[str]] = None
     ) -> str:
         """
         构建落子请求的提示词
@@ -142,63 +321,38 @@ class PromptBuilder:
             board_size: 棋盘大小
             suggested_move: 传统AI建议的落子位置 (row, col)
             user_instruction: 用户的落子指令（如果有）
+            prerendered_board: 调用方维护的 render_board_rows 结果（可选），
+                提供时直接使用，不再重新渲染棋盘
             
         Returns:
             完整的提示词字符串
         """
-        player_symbol = "●(黑棋)" if current_player == 1 else "○(白棋)"
-        
         # 构建建议位置文本
         suggestion_text = ""
         if suggested_move:
             row, col = suggested_move
-            pos_str = cls.coords_to_position(row, col)
-            suggestion_text = f"""
-## 算法建议
-传统五子棋算法分析认为最优落子位置是：{pos_str}
-这个建议基于棋盘评估和搜索算法，仅供参考。你可以采纳，也可以根据自己的判断选择其他位置。
-"""
+            suggestion_text = _SUGGESTION_TEMPLATE.format(
+                position=cls.coords_to_position(row, col)
+            )
         
         # 用户指令优先
         user_instruction_text = ""
         if user_instruction:
-            user_instruction_text = f"""
-## 用户指令（最高优先级）
-用户要求你下在：{user_instruction}
-请优先遵循用户的指令。
-"""
-        
-        prompt = f"""你是一个正在和用户下五子棋的AI，你执{player_symbol}。
-
-## 游戏规则
-1. 棋盘大小为 {board_size}x{board_size}
-2. 先连成五子（横、竖、斜）的一方获胜
-3. 黑棋先手（用户），你是白棋
-
-## 当前棋盘状态
-坐标系统：列用字母A-T表示，行用数字1-20表示
-例如：A1表示左上角，J10表示中心位置
-
-{cls.board_to_text(board, board_size)}
-
-## 落子历史（最近10步）
-{cls.history_to_text(history[-10:] if len(history) > 10 else history)}
-{user_instruction_text}{suggestion_text}
-## 你的任务
-1. 如果用户有指令，优先遵循用户指令
-2. 否则可以参考算法建议，或根据自己判断选择落子位置
-3. 简要分析你的落子策略
-
-**重要：你的回复必须包含以下格式的落子位置：**
-MOVE: <列字母><行数字>
-
-例如：MOVE: J10 或 MOVE: H8
-
-请给出你的落子："""
-        
-        return prompt
+            user_instruction_text = _USER_INSTRUCTION_TEMPLATE.format(
+                instruction=user_instruction
+            )
+        
+        return _MOVE_PROMPT_TEMPLATE.format_map({
+            "player_symbol": _MOVE_PLAYER_SYMBOLS[current_player == 1],
+            "board_size": board_size,
+            "board_text": cls._board_text(board, board_size, prerendered_board),
+            "history_text": cls.history_to_text(history[-10:]),
+            "user_instruction_text": user_instruction_text,
+            "suggestion_text": suggestion_text,
+        })
     
     @classmethod
+    @functools.lru_cache(maxsize=None)
     def coords_to_position(cls, row: int, col: int) -> str:
         """将坐标转换为位置字符串，如 (7, 7) -> 'H8'"""
         if 0 <= col < len(cls.COL_LABELS):
@@ -208,10 +362,11 @@ MOVE: <列字母><行数字>
     @classmethod
     def build_chat_prompt(
         cls,
-        board: Optional[List[List[int]]] = None,
+        board: Optional[BoardData] = None,
         current_player: Optional[int] = None,
         history: Optional[List[Tuple[int, int, int]]] = None,
-        board_size: int = 20
+        board_size: int = 20,
+        prerendered_board: Optional[List[str]] = None
     ) -> str:
         """
         构建聊天系统提示词
@@ -221,42 +376,46 @@ MOVE: <列字母><行数字>
             current_player: 当前玩家
             history: 落子历史
             board_size: 棋盘大小
+            prerendered_board: 调用方维护的 render_board_rows 结果（可选）
             
         Returns:
             系统提示词字符串
         """
-        base_prompt = """你是一个正在和用户下五子棋的AI对手，你执白棋(○)，用户执黑棋(●)。
-
-你可以：
-1. 讨论你的落子策略和思考过程
-2. 分析当前局势和对手的走法
-3. 回答用户关于五子棋的任何问题
-4. 进行友好的对战交流
-
-注意：
-- 你是白棋选手，记住你下过的每一步棋
-- 如果用户询问你为什么这样下，要解释你的策略
-- 回复请控制在100字以内，保持简洁"""
+        if board is None:
+            return _CHAT_BASE_PROMPT
+        
+        prompt = _CHAT_BASE_PROMPT + _CHAT_BOARD_TEMPLATE.format(
+            player_str=_CHAT_PLAYER_NAMES.get(current_player, "未知"),
+            board_text=cls._board_text(board, board_size, prerendered_board)
+        )
+        if history:
+            prompt += _CHAT_HISTORY_TEMPLATE.format(
+                history_text=cls.history_to_text(history[-10:])
+            )
+        return prompt
+    
+    @staticmethod
+    def history_messages(chat_history: List[ChatHistoryItem], limit: int = 10) -> List[Dict[str, str]]:
+        """
+        将最近 limit 条聊天历史转换为API消息格式
         
-        if board is not None:
-            player_str = "黑棋(用户)" if current_player == 1 else "白棋(你)" if current_player == 2 else "未知"
-            board_context = f"""
-
-## 当前棋盘状态（{player_str}回合）
-{cls.board_to_text(board, board_size)}"""
-            
-            if history:
-                board_context += f"""
-
-## 落子历史（最近10步）
-{cls.history_to_text(history[-10:] if len(history) > 10 else history)}"""
-            
-            return base_prompt + board_context
+        已经是API消息字典的条目直接复用，不再重新构建
         
-        return base_prompt
+        Args:
+            chat_history: 聊天历史
+            limit: 最多保留的消息数量
+            
+        Returns:
+            [{"role": ..., "content": ...}, ...] 列表
+        """
+        recent = islice(chat_history, max(0, len(chat_history) - limit), None)
+        return [
+            msg if isinstance(msg, dict) else {"role": msg.role, "content": msg.content}
+            for msg in recent
+        ]
     
     @classmethod
-    def board_to_text(cls, board: List[List[int]], board_size: int = 20) -> str:
+    def board_to_text(cls, board: BoardData, board_size: int = 20) -> str:
         """
         将棋盘转换为文本表示
         
@@ -267,27 +426,95 @@ MOVE: <列字母><行数字>
         Returns:
             棋盘的文本表示
         """
-        lines = []
+        return "\n".join(cls.render_board_rows(board, board_size))
+    
+    @classmethod
+    def render_board_rows(cls, board: BoardData, board_size: int = 20) -> List[str]:
+        """
+        将棋盘渲染为逐行文本
+        
+        调用方可以保存返回的列表，落子后只用 render_board_row 更新变化的行，
+        再通过 prerendered_board 参数传给提示词构建方法。
         
-        # 列标签
-        col_header = "   " + " ".join(cls.COL_LABELS[:board_size])
-        lines.append(col_header)
+        Args:
+            board: 棋盘状态
+            board_size: 棋盘大小
+            
+        Returns:
+            board_size + 1 行文本，第0行为列标签，第 r + 1 行对应棋盘第 r 行
+        """
+        # 预分配全部行：第0行为列标签
+        rows = [None] * (board_size + 1)
+        rows[0] = "   " + " ".join(cls.COL_LABELS[:board_size])
         
-        # 棋盘内容
+        # 整盘只做一次字节 -> 符号的转换，每个格子占 "符号 " 两个字符，再按行切片
+        text = cls.flatten_board(board, board_size).decode("latin-1").translate(cls._CELL_TRANSLATION)
+        width = 2 * board_size
         for row in range(board_size):
-            row_num = str(row + 1).rjust(2)
-            cells = []
-            for col in range(board_size):
-                cell = board[row][col]
-                if cell == 0:
-                    cells.append("·")
-                elif cell == 1:
-                    cells.append("●")
-                else:
-                    cells.append("○")
-            lines.append(f"{row_num} " + " ".join(cells))
+            start = row * width
+            rows[row + 1] = f"{row + 1:>2} " + text[start:start + width - 1]
         
-        return "\n".join(lines)
+        return rows
+    
+    @classmethod
+    def render_board_row(cls, board: BoardData, row: int, board_size: int = 20) -> str:
+        """
+        渲染棋盘的单独一行（带行号）
+        
+        Args:
+            board: 棋盘状态
+            row: 行索引
+            board_size: 棋盘大小
+            
+        Returns:
+            该行的文本表示
+        """
+        if isinstance(board, _FLAT_BOARD_TYPES):
+            cells = bytes(board[row * board_size:(row + 1) * board_size])
+        else:
+            cells = bytes(board[row][:board_size])
+        # 去掉最后一个格子后面的空格
+        return f"{row + 1:>2} " + cells.decode("latin-1").translate(cls._CELL_TRANSLATION)[:-1]
+    
+    @classmethod
+    def flatten_board(cls, board: BoardData, board_size: int = 20) -> bytes:
+        """
+        将棋盘统一为按行展开的扁平字节序列
+        
+        Args:
+            board: 二维列表或已展开的字节序列
+            board_size: 棋盘大小
+            
+        Returns:
+            长度为 board_size * board_size 的 bytes，第 (row, col) 格位于
+            row * board_size + col
+        """
+        if isinstance(board, _FLAT_BOARD_TYPES):
+            return bytes(board)
+        return b"".join(bytes(board[row][:board_size]) for row in range(board_size))
+    
+    @classmethod
+    def _board_text(
+        cls,
+        board: BoardData,
+        board_size: int,
+        prerendered_board: Optional[List[str]] = None
+    ) -> str:
+        """优先使用预渲染的行，否则按棋盘内容缓存渲染结果"""
+        if prerendered_board is not None:
+            return "\n".join(prerendered_board)
+        return cls._cached_board_text(cls.flatten_board(board, board_size), board_size)
+    
+    @classmethod
+    @functools.lru_cache(maxsize=4)
+    def _cached_board_text(cls, flat_board: bytes, board_size: int) -> str:
+        """
+        以扁平字节序列为键缓存棋盘文本
+        
+        同一回合内的重试和随后的聊天请求棋盘不变，只需渲染一次；
+        旧局面由 LRU 自动淘汰。
+        """
+        return cls.board_to_text(flat_board, board_size)
     
     @classmethod
     def history_to_text(cls, history: List[Tuple[int, int, int]]) -> str:
@@ -312,6 +539,7 @@ MOVE: <列字母><行数字>
         return "\n".join(lines)
     
     @classmethod
+    @functools.lru_cache(maxsize=1024)
     def position_to_coords(cls, position: str, board_size: int = 20) -> Optional[Tuple[int, int]]:
         """
         将位置字符串转换为坐标
@@ -322,24 +550,22 @@ MOVE: <列字母><行数字>
         
         Args:
             position: 位置字符串
-            board_size: 棋盘大小，默认25
+            board_size: 棋盘大小，默认20
             
         Returns:
             (row, col) 元组，解析失败返回 None
         """
         position = position.strip().upper()
         
-        if len(position) < 2 or len(position) > 3:
+        if not 2 <= len(position) <= 3:
             return None
         
         col_char = position[0]
         row_str = position[1:]
         
         # 解析列
-        if col_char not in cls.COL_LABELS:
-            return None
-        col = cls.COL_LABELS.index(col_char)
-        if col >= board_size:
+        col = cls._COL_INDEX.get(col_char)
+        if col is None or col >= board_size:
             return None
         
         # 解析行
@@ -372,30 +598,18 @@ class ResponseParser:
         Returns:
             (row, col, reasoning) 元组，解析失败返回 None
         """
-        lines = response.strip().split('\n')
-        reasoning = ""
+        # 多个 MOVE: 行时以最后一个有效位置为准
         position = None
-        
-        for line in lines:
-            line = line.strip()
-            
-            # 查找 MOVE: 格式
-            if line.upper().startswith("MOVE:"):
-                pos_str = line[5:].strip()
-                coords = PromptBuilder.position_to_coords(pos_str, board_size)
-                if coords:
-                    position = coords
-            else:
-                # 收集分析内容作为推理
-                if line and not line.upper().startswith("MOVE"):
-                    if reasoning:
-                        reasoning += " "
-                    reasoning += line
+        for pos_str in reversed(_MOVE_RE.findall(response)):
+            position = PromptBuilder.position_to_coords(pos_str, board_size)
+            if position:
+                break
         
         if position:
-            row, col = position
-            if 0 <= row < board_size and 0 <= col < board_size:
-                return (row, col, reasoning)
+            # 除 MOVE 行以外的分析内容作为推理
+            body = _MOVE_LINE_RE.sub("", response)
+            reasoning = " ".join(filter(None, map(str.strip, body.split('\n'))))
+            return (position[0], position[1], reasoning)
         
         # 尝试其他格式解析
         return cls._try_alternative_formats(response, board_size)
@@ -410,11 +624,8 @@ class ResponseParser:
         - "(row, col)" 格式
         - "row:X, col:Y" 格式
         """
-        import re
-        
         # 尝试匹配标准坐标格式（如 H8, M13, A1）- 支持A-Y
-        pattern = r'\b([A-Ya-y])(\d{1,2})\b'
-        matches = re.findall(pattern, response)
+        matches = _ALT_COORD_RE.findall(response)
         
         for col_char, row_str in matches:
             coords = PromptBuilder.position_to_coords(col_char + row_str, board_size)
@@ -424,8 +635,7 @@ class ResponseParser:
                     return (row, col, "")
         
         # 尝试匹配 (row, col) 格式
-        pattern = r'\((\d{1,2})\s*,\s*(\d{1,2})\)'
-        matches = re.findall(pattern, response)
+        matches = _ALT_TUPLE_RE.findall(response)
         
         for row_str, col_str in matches:
             try:
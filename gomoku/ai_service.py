@@ -4,12 +4,75 @@ AI服务工厂
 负责根据配置创建对应的AI提供商实例
 """
 
-from typing import Optional
+import hashlib
+import importlib
+import importlib.util
+from typing import Optional, Dict
 from gomoku.config import AIConfig, AIProviderType, load_ai_config, ConfigError
 from gomoku.ai_provider import AIProvider
 from gomoku.logger import get_logger
 
 
+# 提供商类型 -> (SDK包名, 实现模块, 实现类名, 显示名称)
+_PROVIDER_SPECS = {
+    AIProviderType.OPENAI: (
+        "openai", "gomoku.providers.openai_provider", "OpenAIProvider", "OpenAI"
+    ),
+    AIProviderType.ANTHROPIC: (
+        "anthropic", "gomoku.providers.anthropic_provider", "AnthropicProvider", "Anthropic"
+    ),
+}
+
+# 已导入的提供商实现类，每个进程只导入一次
+_PROVIDER_CLASSES: Dict[AIProviderType, type] = {}
+
+# 已创建的提供商实例，按配置指纹缓存
+_PROVIDER_CACHE: Dict[tuple, AIProvider] = {}
+
+
+def _provider_cache_key(config: AIConfig) -> tuple:
+    """根据配置生成缓存键（API密钥只参与哈希，不直接作为键保存）"""
+    key_digest = hashlib.blake2b(
+        (config.api_key or "").encode("utf-8"), digest_size=16
+    ).hexdigest()
+    return (
+        config.provider,
+        config.model,
+        config.endpoint,
+        config.timeout,
+        config.max_retries,
+        key_digest,
+    )
+
+
+def _get_provider_class(provider_type: AIProviderType) -> type:
+    """
+    获取提供商实现类，首次调用时导入
+    
+    Raises:
+        ConfigError: 未知的提供商
+        ImportError: 缺少对应的SDK
+    """
+    cls = _PROVIDER_CLASSES.get(provider_type)
+    if cls is not None:
+        return cls
+    
+    spec = _PROVIDER_SPECS.get(provider_type)
+    if spec is None:
+        raise ConfigError(f"未知的AI提供商: {provider_type}")
+    
+    sdk_name, module_name, class_name, display_name = spec
+    # 先检查SDK是否安装，避免执行模块代码后才失败
+    if importlib.util.find_spec(sdk_name) is None:
+        raise ImportError(
+            f"{display_name}库未安装，请运行: pip install {sdk_name}"
+        )
+    
+    cls = getattr(importlib.import_module(module_name), class_name)
+    _PROVIDER_CLASSES[provider_type] = cls
+    return cls
+
+
 class AIServiceFactory:
     """
     AI服务工厂
@@ -38,7 +101,7 @@ class AIServiceFactory:
             try:
                 config = load_ai_config()
             except ConfigError as e:
-                logger.error(f"加载AI配置失败: {e}")
+                logger.error("加载AI配置失败: %s", e)
                 raise
         
         # 传统AI不需要创建provider
@@ -46,28 +109,26 @@ class AIServiceFactory:
             logger.info("使用传统AI算法")
             return None
         
+        # 相同配置直接复用已创建的实例
+        cache_key = _provider_cache_key(config)
+        provider = _PROVIDER_CACHE.get(cache_key)
+        if provider is not None:
+            logger.info("复用%s提供商: %s", provider.provider_name, config.model)
+            return provider
+        
         # 创建对应的提供商
         try:
-            if config.provider == AIProviderType.OPENAI:
-                from gomoku.providers.openai_provider import OpenAIProvider
-                provider = OpenAIProvider(config)
-                logger.info(f"创建OpenAI提供商: {config.model}")
-                return provider
-                
-            elif config.provider == AIProviderType.ANTHROPIC:
-                from gomoku.providers.anthropic_provider import AnthropicProvider
-                provider = AnthropicProvider(config)
-                logger.info(f"创建Anthropic提供商: {config.model}")
-                return provider
-            
-            else:
-                raise ConfigError(f"未知的AI提供商: {config.provider}")
+            provider_class = _get_provider_class(config.provider)
+            provider = provider_class(config)
+            logger.info("创建%s提供商: %s", provider.provider_name, config.model)
+            _PROVIDER_CACHE[cache_key] = provider
+            return provider
                 
         except ImportError as e:
-            logger.error(f"创建AI提供商失败，缺少依赖: {e}")
+            logger.error("创建AI提供商失败，缺少依赖: %s", e)
             raise
         except Exception as e:
-            logger.error(f"创建AI提供商失败: {e}")
+            logger.error("创建AI提供商失败: %s", e)
             raise
 
 
@@ -98,7 +159,7 @@ def get_ai_provider(
         provider = AIServiceFactory.create_provider(config)
         return provider, config
     except Exception as e:
-        get_logger().error(f"获取AI提供商失败: {e}")
+        get_logger().error("获取AI提供商失败: %s", e)
         # 返回传统AI作为降级
         from gomoku.config import AIConfig, AIProviderType
         fallback_config = AIConfig(provider=AIProviderType.TRADITIONAL)
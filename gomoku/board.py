@@ -2,6 +2,17 @@
 棋盘类 - 管理25x25的五子棋棋盘
 """
 
+import random
+
+
+def _make_zobrist_table(size):
+    """生成 Zobrist 随机数表，下标为 (row * size + col) * 2 + player - 1
+
+    使用固定种子，保证同一局面在不同进程中哈希一致
+    """
+    rng = random.Random(0)
+    return [rng.getrandbits(64) for _ in range(size * size * 2)]
+
 
 class Board:
     """五子棋棋盘类"""
@@ -10,6 +21,9 @@ class Board:
     BLACK = 1  # 玩家 ●
     WHITE = 2  # AI ○
     SIZE = 20  # 20x20 棋盘
+    ZOBRIST = _make_zobrist_table(SIZE)
+    # 胜负判断的四个方向（只需正方向，反方向取相反数）：横、竖、左斜、右斜
+    _WIN_DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
     
     def __init__(self):
         """初始化棋盘"""
@@ -17,6 +31,7 @@ class Board:
         self.last_move = None  # 记录最后一步 (row, col, player)
         self.move_count = 0
         self.history = []  # 落子历史记录 [(row, col, player), ...]
+        self.hash = 0  # 当前局面的 Zobrist 哈希，落子/悔棋时增量更新
     
     @property
     def grid(self):
@@ -38,8 +53,39 @@ class Board:
         self.last_move = (row, col, player)
         self.history.append((row, col, player))  # 记录历史
         self.move_count += 1
+        self.hash ^= self.ZOBRIST[(row * self.SIZE + col) * 2 + player - 1]
         return True
     
+    def undo(self):
+        """撤销最后一步落子
+        
+        Returns:
+            被撤销的 (row, col, player)，没有可撤销的落子时返回 None
+        """
+        if not self.history:
+            return None
+        
+        row, col, player = move = self.history.pop()
+        self.board[row][col] = self.EMPTY
+        self.move_count -= 1
+        self.hash ^= self.ZOBRIST[(row * self.SIZE + col) * 2 + player - 1]
+        self.last_move = self.history[-1] if self.history else None
+        return move
+    
+    def copy(self):
+        """
+        复制当前局面（棋盘、历史、哈希）
+        
+        AI在后台线程中对副本搜索（搜索时会落子/悔棋），界面线程可以照常读取原棋盘
+        """
+        other = Board.__new__(Board)
+        other.board = [row[:] for row in self.board]
+        other.last_move = self.last_move
+        other.move_count = self.move_count
+        other.history = list(self.history)
+        other.hash = self.hash
+        return other
+    
     def get_stone(self, row, col):
         """获取指定位置的棋子"""
         if 0 <= row < self.SIZE and 0 <= col < self.SIZE:
@@ -56,31 +102,29 @@ class Board:
         Returns:
             bool: 是否获胜
         """
-        player = self.board[row][col]
+        grid = self.board
+        size = self.SIZE
+        player = grid[row][col]
         if player == self.EMPTY:
             return False
         
-        # 四个方向：横、竖、左斜、右斜
-        directions = [
-            [(0, 1), (0, -1)],   # 横向
-            [(1, 0), (-1, 0)],   # 纵向
-            [(1, 1), (-1, -1)],  # 左上到右下
-            [(1, -1), (-1, 1)]   # 右上到左下
-        ]
-        
-        for direction in directions:
+        # 只有经过这一子的四条线可能新连成五子，凑够五子即停止（每侧最多看4格）
+        for dx, dy in self._WIN_DIRECTIONS:
             count = 1  # 包含当前位置
             
-            # 检查两个方向
-            for dx, dy in direction:
-                x, y = row + dx, col + dy
-                while 0 <= x < self.SIZE and 0 <= y < self.SIZE:
-                    if self.board[x][y] == player:
-                        count += 1
-                        x += dx
-                        y += dy
-                    else:
-                        break
+            # 正方向
+            x, y = row + dx, col + dy
+            while count < 5 and 0 <= x < size and 0 <= y < size and grid[x][y] == player:
+                count += 1
+                x += dx
+                y += dy
+            
+            # 反方向
+            x, y = row - dx, col - dy
+            while count < 5 and 0 <= x < size and 0 <= y < size and grid[x][y] == player:
+                count += 1
+                x -= dx
+                y -= dy
             
             if count >= 5:
                 return True
@@ -162,3 +206,4 @@ class Board:
         self.last_move = None
         self.move_count = 0
         self.history = []  # 清空历史
+        self.hash = 0
@@ -4,11 +4,19 @@
 管理聊天历史和上下文信息
 """
 
-from typing import List, Optional
+import re
+from bisect import bisect_right
+from collections import deque
+from itertools import accumulate, islice
+from typing import Deque, Dict, List, Optional, Tuple
 from dataclasses import dataclass, field
 from gomoku.ai_provider import ChatMessage
 
 
+# 显示宽度为2的中文字符
+_WIDE_CHAR_RE = re.compile('[\u4e00-\u9fff]')
+
+
 @dataclass
 class ChatManager:
     """
@@ -18,7 +26,34 @@ class ChatManager:
     """
     
     max_history: int = 10  # 最大历史消息数量
-    history: List[ChatMessage] = field(default_factory=list)
+    history: Deque[ChatMessage] = field(default_factory=deque)
+    # 显示格式缓存：历史每次变化版本号加一，版本和宽度不变时直接复用上次结果
+    _version: int = field(default=0, init=False, repr=False, compare=False)
+    _display_cache: Optional[Tuple[Tuple[int, int], List[tuple]]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    # 单条消息的换行结果，新消息到来时旧消息无需重新换行
+    _wrap_cache: Dict[Tuple[str, int], List[str]] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    # 与 history 一一对应的API消息格式 {"role", "content"}，发送聊天时无需逐条转换
+    _api_messages: Deque[Dict[str, str]] = field(
+        default_factory=deque, init=False, repr=False, compare=False
+    )
+    
+    def __post_init__(self):
+        """按 max_history 构建有界队列，超出时自动丢弃最早的消息"""
+        self.history = deque(self.history, maxlen=self.max_history)
+        self._api_messages = deque(
+            ({"role": msg.role, "content": msg.content} for msg in self.history),
+            maxlen=self.max_history
+        )
+    
+    def _append(self, role: str, content: str):
+        """同时追加到聊天历史和API消息"""
+        self.history.append(ChatMessage(role=role, content=content))
+        self._api_messages.append({"role": role, "content": content})
+        self._version += 1
     
     def add_user_message(self, content: str):
         """
@@ -27,8 +62,7 @@ class ChatManager:
         Args:
             content: 消息内容
         """
-        self.history.append(ChatMessage(role="user", content=content))
-        self._trim_history()
+        self._append("user", content)
     
     def add_assistant_message(self, content: str):
         """
@@ -37,8 +71,29 @@ class ChatManager:
         Args:
             content: 消息内容
         """
-        self.history.append(ChatMessage(role="assistant", content=content))
-        self._trim_history()
+        self._append("assistant", content)
+    
+    def append_to_last_assistant(self, text: str):
+        """
+        向最后一条助手消息追加内容（用于流式回复）
+        
+        最后一条不是助手消息时新建一条
+        
+        Args:
+            text: 追加的内容
+        """
+        if self.history and self.history[-1].role == "assistant":
+            last = self.history[-1]
+            # 旧内容的换行结果不会再用到，及时丢弃，免得流式回复很快把缓存撑满而整体清空
+            old = last.content
+            for key in [k for k in self._wrap_cache if k[0] == old]:
+                del self._wrap_cache[key]
+            last.content = old + text
+            # 替换而不是修改字典：已交给后台请求的消息快照保持不变
+            self._api_messages[-1] = {"role": "assistant", "content": last.content}
+            self._version += 1
+        else:
+            self._append("assistant", text)
     
     def get_history(self) -> List[ChatMessage]:
         """
@@ -47,16 +102,29 @@ class ChatManager:
         Returns:
             聊天历史列表
         """
-        return self.history.copy()
+        return list(self.history)
+    
+    def api_messages_excluding_last(self, limit: int = 10) -> List[Dict[str, str]]:
+        """
+        获取除最新一条以外、最近 limit 条聊天历史的API消息格式
+        
+        可直接作为 AIProvider.chat 的 chat_history 传入
+        
+        Args:
+            limit: 最多返回的消息数量
+            
+        Returns:
+            [{"role": ..., "content": ...}, ...] 列表
+        """
+        end = max(0, len(self._api_messages) - 1)
+        return list(islice(self._api_messages, max(0, end - limit), end))
     
     def clear_history(self):
         """清空聊天历史"""
         self.history.clear()
-    
-    def _trim_history(self):
-        """裁剪历史记录，保持在最大数量以内"""
-        while len(self.history) > self.max_history:
-            self.history.pop(0)
+        self._api_messages.clear()
+        self._version += 1
+        self._wrap_cache.clear()
     
     def get_recent_messages(self, count: int = 5) -> List[ChatMessage]:
         """
@@ -68,7 +136,7 @@ class ChatManager:
         Returns:
             最近的消息列表
         """
-        return self.history[-count:] if len(self.history) >= count else self.history.copy()
+        return list(islice(self.history, max(0, len(self.history) - count), None))
     
     def format_for_display(self, max_width: int = 35) -> List[tuple]:
         """
@@ -80,12 +148,25 @@ class ChatManager:
         Returns:
             [(role, formatted_lines), ...] 列表
         """
+        key = (self._version, max_width)
+        if self._display_cache is not None and self._display_cache[0] == key:
+            return list(self._display_cache[1])
+        
+        wrap_cache = self._wrap_cache
+        if len(wrap_cache) > 4 * self.max_history:
+            wrap_cache.clear()
+        
         result = []
         for msg in self.history:
             # 将消息内容按宽度分割成多行
-            lines = self._wrap_text(msg.content, max_width)
+            wrap_key = (msg.content, max_width)
+            lines = wrap_cache.get(wrap_key)
+            if lines is None:
+                lines = wrap_cache[wrap_key] = self._wrap_text(msg.content, max_width)
             result.append((msg.role, lines))
-        return result
+        
+        self._display_cache = (key, result)
+        return list(result)
     
     def _wrap_text(self, text: str, max_width: int) -> List[str]:
         """
@@ -104,22 +185,28 @@ class ChatManager:
                 lines.append('')
                 continue
             
-            current_line = ''
-            current_width = 0
+            wide_chars = [m.start() for m in _WIDE_CHAR_RE.finditer(paragraph)]
+            if not wide_chars:
+                # 纯半角文本：宽度等于字符数，直接按固定长度切片
+                lines.extend(
+                    paragraph[i:i + max_width]
+                    for i in range(0, len(paragraph), max_width)
+                )
+                continue
             
-            for char in paragraph:
-                # 中文字符宽度为2，其他为1
-                char_width = 2 if '\u4e00' <= char <= '\u9fff' else 1
-                
-                if current_width + char_width > max_width:
-                    lines.append(current_line)
-                    current_line = char
-                    current_width = char_width
-                else:
-                    current_line += char
-                    current_width += char_width
+            # 中文字符宽度为2，其他为1；用累计宽度二分查找每行的断点
+            widths = [1] * len(paragraph)
+            for i in wide_chars:
+                widths[i] = 2
+            cumulative = list(accumulate(widths))
             
-            if current_line:
-                lines.append(current_line)
+            start = 0
+            consumed = 0
+            while start < len(paragraph):
+                end = bisect_right(cumulative, consumed + max_width, start)
+                end = max(end, start + 1)  # 单个字符超宽时也要前进
+                lines.append(paragraph[start:end])
+                consumed = cumulative[end - 1]
+                start = end
         
         return lines if lines else ['']
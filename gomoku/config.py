@@ -8,13 +8,30 @@ AI配置管理模块
 4. 默认值（传统AI）
 """
 
+from __future__ import annotations
+
 import os
-import json
-from pathlib import Path
-from dataclasses import dataclass, asdict
+import sys
+import functools
+from dataclasses import dataclass
 from typing import Optional, Dict, Any
 from enum import Enum
 
+__all__ = [
+    "AIProviderType",
+    "AIConfig",
+    "ConfigError",
+    "get_config_dir",
+    "get_config_file",
+    "save_config_to_file",
+    "load_config_from_file",
+    "delete_config_file",
+    "load_ai_config",
+    "validate_config",
+    "get_config_summary",
+    "interactive_config",
+]
+
 
 class AIProviderType(Enum):
     """AI提供商类型枚举"""
@@ -23,9 +40,23 @@ class AIProviderType(Enum):
     TRADITIONAL = "traditional"  # 传统AI（内置算法）
 
 
-@dataclass
+# 提供商字符串到枚举的映射，避免每次解析都走 Enum 调用和异常分支
+_PROVIDER_BY_VALUE = {p.value: p for p in AIProviderType}
+_VALID_PROVIDERS_STR = ", ".join(_PROVIDER_BY_VALUE)
+
+# Anthropic API 密钥前缀
+_ANT_PREFIX = "sk-ant-"
+_ANT_PREFIX_LEN = len(_ANT_PREFIX)
+
+
+# 默认模型配置
+DEFAULT_OPENAI_MODEL = "gpt-4o"
+DEFAULT_ANTHROPIC_MODEL = "claude-3-5-sonnet-20241022"
+
+
+@dataclass(frozen=True)
 class AIConfig:
-    """AI配置数据类"""
+    """AI配置数据类（不可变，可作为缓存键）"""
     provider: AIProviderType
     api_key: Optional[str] = None
     model: Optional[str] = None
@@ -33,17 +64,13 @@ class AIConfig:
     timeout: int = 30
     max_retries: int = 3
     
-    # 默认模型配置
-    DEFAULT_OPENAI_MODEL = "gpt-4o"
-    DEFAULT_ANTHROPIC_MODEL = "claude-3-5-sonnet-20241022"
-    
     def __post_init__(self):
         """初始化后处理，设置默认值"""
         if self.model is None:
             if self.provider == AIProviderType.OPENAI:
-                self.model = self.DEFAULT_OPENAI_MODEL
+                object.__setattr__(self, "model", DEFAULT_OPENAI_MODEL)
             elif self.provider == AIProviderType.ANTHROPIC:
-                self.model = self.DEFAULT_ANTHROPIC_MODEL
+                object.__setattr__(self, "model", DEFAULT_ANTHROPIC_MODEL)
 
 
 class ConfigError(Exception):
@@ -52,14 +79,29 @@ class ConfigError(Exception):
 
 
 # 配置文件路径
-def get_config_dir() -> Path:
+def get_config_dir() -> str:
     """获取配置目录路径"""
-    return Path.home() / ".gomoku"
+    return os.path.join(os.path.expanduser("~"), ".gomoku")
 
 
-def get_config_file() -> Path:
+def get_config_file() -> str:
     """获取配置文件路径"""
-    return get_config_dir() / "config.json"
+    return os.path.join(get_config_dir(), "config.json")
+
+
+def _dump_config_json(config_data: Dict[str, Any]) -> bytes:
+    """
+    将配置序列化为 UTF-8 编码的 JSON
+    
+    优先使用 orjson（如已安装），否则回退到标准库 json。
+    两者都保留两空格缩进，方便用户手动编辑配置文件。
+    """
+    try:
+        import orjson
+    except ImportError:
+        import json
+        return json.dumps(config_data, indent=2, ensure_ascii=False).encode("utf-8")
+    return orjson.dumps(config_data, option=orjson.OPT_INDENT_2)
 
 
 def save_config_to_file(config: AIConfig) -> bool:
@@ -73,8 +115,7 @@ def save_config_to_file(config: AIConfig) -> bool:
         是否保存成功
     """
     try:
-        config_dir = get_config_dir()
-        config_dir.mkdir(parents=True, exist_ok=True)
+        os.makedirs(get_config_dir(), exist_ok=True)
         
         config_data = {
             "provider": config.provider.value,
@@ -85,31 +126,58 @@ def save_config_to_file(config: AIConfig) -> bool:
             "max_retries": config.max_retries
         }
         
-        config_file = get_config_file()
-        with open(config_file, "w", encoding="utf-8") as f:
-            json.dump(config_data, f, indent=2, ensure_ascii=False)
+        # 先完整序列化，再一次性写入
+        content = _dump_config_json(config_data)
+        with open(get_config_file(), "wb") as f:
+            f.write(content)
+        _load_config_cached.cache_clear()
         
         return True
     except Exception:
         return False
 
 
+@functools.lru_cache(maxsize=4)
+def _load_config_cached(path: str, mtime_ns: int) -> Optional[Dict[str, Any]]:
+    """
+    读取并解析配置文件（按路径和修改时间缓存）
+    
+    Args:
+        path: 配置文件路径
+        mtime_ns: 文件修改时间，文件变化后缓存自动失效
+        
+    Returns:
+        配置字典，读取失败返回 None
+    """
+    import json
+    
+    try:
+        # 一次读入整个文件再解析，避免 json.load 经文件对象分段读取
+        with open(path, "rb") as f:
+            data = f.read()
+        return json.loads(data.decode("utf-8"))
+    except Exception:
+        return None
+
+
 def load_config_from_file() -> Optional[Dict[str, Any]]:
     """
     从配置文件加载配置
     
+    同一进程内文件未变化时直接返回缓存结果，不再重复读取和解析
+    
     Returns:
         配置字典，如果文件不存在或读取失败返回 None
     """
     config_file = get_config_file()
-    if not config_file.exists():
-        return None
-    
     try:
-        with open(config_file, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception:
+        mtime_ns = os.stat(config_file).st_mtime_ns
+    except OSError:
         return None
+    
+    config = _load_config_cached(config_file, mtime_ns)
+    # 返回副本，避免调用方修改缓存内容
+    return dict(config) if config is not None else None
 
 
 def delete_config_file() -> bool:
@@ -119,16 +187,45 @@ def delete_config_file() -> bool:
     Returns:
         是否删除成功
     """
-    config_file = get_config_file()
-    if config_file.exists():
-        try:
-            config_file.unlink()
-            return True
-        except Exception:
-            return False
+    try:
+        os.remove(get_config_file())
+    except FileNotFoundError:
+        return True
+    except OSError:
+        return False
+    _load_config_cached.cache_clear()
     return True
 
 
+# 读取的环境变量
+_ENV_KEYS = (
+    "AI_PROVIDER",
+    "AI_API_KEY",
+    "AI_MODEL",
+    "AI_ENDPOINT",
+    "AI_TIMEOUT",
+    "AI_MAX_RETRIES",
+)
+
+
+def _read_env_config() -> Dict[str, str]:
+    """
+    一次性读取所有AI相关环境变量
+    
+    Returns:
+        已设置且非空白的环境变量（值已去除首尾空白）
+    """
+    env = os.environ
+    values = {}
+    for key in _ENV_KEYS:
+        value = env.get(key)
+        if value:
+            value = value.strip()
+            if value:
+                values[key] = value
+    return values
+
+
 def load_ai_config(
     cli_provider: Optional[str] = None,
     cli_api_key: Optional[str] = None,
@@ -152,16 +249,22 @@ def load_ai_config(
     Raises:
         ConfigError: 配置错误时抛出
     """
+    env_config = _read_env_config()
+    env_provider = env_config.get("AI_PROVIDER")
+    
+    # 快速路径：没有任何来源指定提供商时直接使用传统AI，无需读取配置文件
+    if not cli_provider and not env_provider and not os.path.isfile(get_config_file()):
+        return AIConfig(provider=AIProviderType.TRADITIONAL)
+    
     # 1. 从配置文件加载（最低优先级）
     file_config = load_config_from_file() or {}
     
     # 2. 从环境变量获取（中等优先级）
-    env_provider = os.environ.get("AI_PROVIDER", "").strip() or None
-    env_api_key = os.environ.get("AI_API_KEY", "").strip() or None
-    env_model = os.environ.get("AI_MODEL", "").strip() or None
-    env_endpoint = os.environ.get("AI_ENDPOINT", "").strip() or None
-    env_timeout = os.environ.get("AI_TIMEOUT", "").strip() or None
-    env_max_retries = os.environ.get("AI_MAX_RETRIES", "").strip() or None
+    env_api_key = env_config.get("AI_API_KEY")
+    env_model = env_config.get("AI_MODEL")
+    env_endpoint = env_config.get("AI_ENDPOINT")
+    env_timeout = env_config.get("AI_TIMEOUT")
+    env_max_retries = env_config.get("AI_MAX_RETRIES")
     
     # 3. 合并配置（按优先级）
     provider_str = (
@@ -190,13 +293,11 @@ def load_ai_config(
     )
     
     # 解析提供商类型
-    try:
-        provider = AIProviderType(provider_str)
-    except ValueError:
-        valid_providers = [p.value for p in AIProviderType]
+    provider = _PROVIDER_BY_VALUE.get(provider_str)
+    if provider is None:
         raise ConfigError(
             f"无效的AI提供商: '{provider_str}'\n"
-            f"有效选项: {', '.join(valid_providers)}"
+            f"有效选项: {_VALID_PROVIDERS_STR}"
         )
     
     # 如果是传统AI，不需要其他配置
@@ -238,9 +339,10 @@ def load_ai_config(
     )
 
 
+@functools.lru_cache(maxsize=8)
 def validate_config(config: AIConfig) -> tuple[bool, str]:
     """
-    验证配置是否有效
+    验证配置是否有效（纯函数，按配置对象缓存结果）
     
     Args:
         config: AI配置对象
@@ -251,20 +353,22 @@ def validate_config(config: AIConfig) -> tuple[bool, str]:
     if config.provider == AIProviderType.TRADITIONAL:
         return True, "使用传统AI（内置算法）"
     
-    if not config.api_key:
+    api_key = config.api_key
+    if not api_key:
         return False, "缺少API密钥"
     
-    # 基本格式检查（OpenAI兼容API可能有不同前缀，放宽检查）
-    if config.provider == AIProviderType.ANTHROPIC:
-        if not config.api_key.startswith("sk-ant-"):
-            return False, "Anthropic API密钥格式可能不正确（应以 'sk-ant-' 开头）"
+    # 基本格式检查（只针对 Anthropic；OpenAI兼容API可能有不同前缀，不做检查）
+    if (config.provider is AIProviderType.ANTHROPIC
+            and api_key[:_ANT_PREFIX_LEN] != _ANT_PREFIX):
+        return False, f"Anthropic API密钥格式可能不正确（应以 '{_ANT_PREFIX}' 开头）"
     
     return True, f"配置有效: {config.provider.value} - {config.model}"
 
 
+@functools.lru_cache(maxsize=8)
 def get_config_summary(config: AIConfig) -> str:
     """
-    获取配置摘要信息（用于显示）
+    获取配置摘要信息（用于显示，按配置对象缓存结果）
     
     Args:
         config: AI配置对象
@@ -288,6 +392,31 @@ def get_config_summary(config: AIConfig) -> str:
     return "\n".join(lines)
 
 
+# 配置向导中的固定文本，预先拼好后整段输出
+_WIZARD_BANNER = (
+    "\n" + "=" * 50 + "\n"
+    "  🎮 五子棋 AI 配置向导\n"
+    + "=" * 50 + "\n"
+)
+
+_PROVIDER_MENU = """
+选择 AI 提供商:
+  1. OpenAI (GPT-4, GPT-4o 等)
+  2. Anthropic (Claude 系列)
+  3. OpenAI 兼容 API (DeepSeek, 智谱, 月之暗面等)
+  4. 传统 AI (内置算法，无需配置)
+  0. 取消
+"""
+
+_COMPAT_ENDPOINTS_HELP = """
+常用 OpenAI 兼容 API 端点:
+  - DeepSeek: https://api.deepseek.com/v1
+  - 智谱 GLM: https://open.bigmodel.cn/api/paas/v4
+  - 月之暗面: https://api.moonshot.cn/v1
+  - Ollama:   http://localhost:11434/v1
+"""
+
+
 def interactive_config() -> Optional[AIConfig]:
     """
     交互式配置向导
@@ -295,25 +424,23 @@ def interactive_config() -> Optional[AIConfig]:
     Returns:
         配置好的 AIConfig 对象，如果用户取消则返回 None
     """
-    print("\n" + "=" * 50)
-    print("  🎮 五子棋 AI 配置向导")
-    print("=" * 50)
+    write = sys.stdout.write
+    write(_WIZARD_BANNER)
     
     # 显示当前配置
     current_config = load_config_from_file()
     if current_config:
-        print("\n当前配置:")
-        print(f"  提供商: {current_config.get('provider', '未设置')}")
-        print(f"  模型: {current_config.get('model', '未设置')}")
-        print(f"  端点: {current_config.get('endpoint', '默认')}")
-        print(f"  API密钥: {'已设置' if current_config.get('api_key') else '未设置'}")
-    
-    print("\n选择 AI 提供商:")
-    print("  1. OpenAI (GPT-4, GPT-4o 等)")
-    print("  2. Anthropic (Claude 系列)")
-    print("  3. OpenAI 兼容 API (DeepSeek, 智谱, 月之暗面等)")
-    print("  4. 传统 AI (内置算法，无需配置)")
-    print("  0. 取消")
+        lines = [
+            "",
+            "当前配置:",
+            f"  提供商: {current_config.get('provider', '未设置')}",
+            f"  模型: {current_config.get('model', '未设置')}",
+            f"  端点: {current_config.get('endpoint', '默认')}",
+            f"  API密钥: {'已设置' if current_config.get('api_key') else '未设置'}",
+        ]
+        print("\n".join(lines))
+    
+    write(_PROVIDER_MENU)
     
     try:
         choice = input("\n请选择 (0-4): ").strip()
@@ -339,18 +466,14 @@ def interactive_config() -> Optional[AIConfig]:
     if choice == "1":
         provider = AIProviderType.OPENAI
         default_endpoint = None
-        default_model = "gpt-4o"
+        default_model = DEFAULT_OPENAI_MODEL
     elif choice == "2":
         provider = AIProviderType.ANTHROPIC
         default_endpoint = None
-        default_model = "claude-3-5-sonnet-20241022"
+        default_model = DEFAULT_ANTHROPIC_MODEL
     else:  # choice == "3"
         provider = AIProviderType.OPENAI
-        print("\n常用 OpenAI 兼容 API 端点:")
-        print("  - DeepSeek: https://api.deepseek.com/v1")
-        print("  - 智谱 GLM: https://open.bigmodel.cn/api/paas/v4")
-        print("  - 月之暗面: https://api.moonshot.cn/v1")
-        print("  - Ollama:   http://localhost:11434/v1")
+        write(_COMPAT_ENDPOINTS_HELP)
         default_endpoint = "https://api.deepseek.com/v1"
         default_model = "deepseek-chat"
     
@@ -386,13 +509,19 @@ def interactive_config() -> Optional[AIConfig]:
     
     # 保存配置
     if save_config_to_file(config):
-        print(f"\n✅ 配置已保存到: {get_config_file()}")
-        print("\n配置摘要:")
-        print(f"  提供商: {provider.value}")
-        print(f"  模型: {model}")
+        lines = [
+            "",
+            f"✅ 配置已保存到: {get_config_file()}",
+            "",
+            "配置摘要:",
+            f"  提供商: {provider.value}",
+            f"  模型: {model}",
+        ]
         if endpoint:
-            print(f"  端点: {endpoint}")
-        print("\n现在可以运行 'gomoku' 开始游戏了！")
+            lines.append(f"  端点: {endpoint}")
+        lines.append("")
+        lines.append("现在可以运行 'gomoku' 开始游戏了！")
+        print("\n".join(lines))
     else:
         print("\n⚠️ 配置保存失败，但本次游戏仍可使用此配置")
     
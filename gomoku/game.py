@@ -2,24 +2,95 @@
 游戏主逻辑 - 游戏流程控制（支持AI对战和聊天）
 """
 
+import concurrent.futures
 import curses
-import time
+import re
 import threading
-from typing import Optional
+import time
+from collections import deque
+from typing import Deque, List, Optional, Tuple
 
 from .board import Board
 from .ai import GomokuAI
-from .ui import GomokuUI, InputMode
+from .ui import GomokuUI, InputMode, char_width, truncate_to_cols
 from .chat_manager import ChatManager
-from .logger import get_logger
+from .logger import close_logger, get_logger
 from .config import AIProviderType, load_ai_config, ConfigError
 from .ai_service import get_ai_provider
-from .ai_provider import AIProvider, MoveResult
+from .ai_provider import AIProvider, MoveResult, PromptBuilder
+
+# 用户落子指令关键词（如 "下在H8"、"走J10"、"play K10"）
+_MOVE_INSTR_RE = re.compile(r"下在|下|走|落|放|move|play", re.IGNORECASE)
+
+# 游戏模式按键 -> 动作
+_KEY_ACTIONS = {
+    ord('q'): 'quit', ord('Q'): 'quit',            # 退出
+    ord('r'): 'restart', ord('R'): 'restart',      # 重新开始
+    ord('h'): 'help', ord('H'): 'help',            # 帮助
+    ord('c'): 'chat', ord('C'): 'chat', ord('/'): 'chat',  # 聊天
+    curses.KEY_ENTER: 'place', ord('\n'): 'place', ord('\r'): 'place', ord(' '): 'place',  # 落子
+    curses.KEY_RESIZE: 'resize',                   # 终端大小变化
+}
+
+# 方向键 / WASD -> 光标移动方向
+_KEY_DIRECTIONS = {
+    curses.KEY_UP: 'up', ord('w'): 'up', ord('W'): 'up',
+    curses.KEY_DOWN: 'down', ord('s'): 'down', ord('S'): 'down',
+    curses.KEY_LEFT: 'left', ord('a'): 'left', ord('A'): 'left',
+    curses.KEY_RIGHT: 'right', ord('d'): 'right', ord('D'): 'right',
+}
+
+# 游戏模式按键 -> ('move', 方向) 或 ('action', 动作)，每次按键只做一次字典查找
+_KEY_DISPATCH = {
+    **{key: ('action', action) for key, action in _KEY_ACTIONS.items()},
+    **{key: ('move', direction) for key, direction in _KEY_DIRECTIONS.items()},
+}
+
+# 游戏结束画面、等待AI落子和聊天输入使用的按键集合
+_KEY_QUIT = frozenset({ord('q'), ord('Q')})
+_KEY_RESTART = frozenset({ord('r'), ord('R')})
+_KEY_CHAT = frozenset({ord('c'), ord('C')})
+_KEY_SEND = frozenset({curses.KEY_ENTER, ord('\n'), ord('\r')})
+
+# 先手的第5子是全局第9手，在此之前不可能连成五子，无需检查胜负
+_MIN_WIN_PLIES = 9
+
+# 状态栏中的当前玩家，按 Board.BLACK / Board.WHITE 下标取值
+_PLAYER_STR = {Board.BLACK: 'black', Board.WHITE: 'white'}
+
+
+def _run_in_daemon_thread(fn, *args, **kwargs) -> "concurrent.futures.Future":
+    """
+    在新的守护线程中运行 fn(*args, **kwargs)，结果通过返回的 Future 获取
+    
+    ThreadPoolExecutor 的工作线程会在解释器退出时被等待结束（即使 shutdown(wait=False)），
+    守护线程不会：退出游戏时仍在进行的AI搜索或网络请求直接被放弃，不会卡住进程
+    """
+    future = concurrent.futures.Future()
+    
+    def worker():
+        if not future.set_running_or_notify_cancel():
+            return  # 开始前已被取消
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+    
+    threading.Thread(target=worker, daemon=True).start()
+    return future
 
 
 class GomokuGame:
     """五子棋游戏主类（支持AI对战和聊天）"""
     
+    # 等待AI服务时的动画帧，以及两帧之间的最短间隔（秒）
+    _SPINNER = "|/-\\"
+    _SPINNER_INTERVAL = 0.1
+    # 等待AI落子时每次轮询的最长等待时间（秒），也是按 Q 退出的最大响应延迟
+    _AI_POLL_INTERVAL = 0.05
+    
     def __init__(
         self, 
         difficulty="medium",
@@ -37,7 +108,14 @@ class GomokuGame:
             cli_model: 命令行指定的模型
         """
         self.board = Board()
+        # 提示词用的棋盘逐行文本，落子后只更新变化的行
+        self._board_rows = PromptBuilder.render_board_rows(self.board.grid, Board.SIZE)
         self.traditional_ai = GomokuAI(difficulty)
+        # AI服务模式下用于计算建议位置的中等难度AI，难度相同时直接复用
+        if self.traditional_ai.difficulty == "medium":
+            self._suggest_ai = self.traditional_ai
+        else:
+            self._suggest_ai = GomokuAI("medium")
         self.ui = GomokuUI()
         self.difficulty = difficulty
         self.current_player = Board.BLACK
@@ -54,11 +132,25 @@ class GomokuGame:
         self.ai_provider: Optional[AIProvider] = None
         self.ai_config = None
         self.use_ai_service = False
+        self._provider_label = ""  # 状态栏显示的AI提供商，只在使用AI服务对战时设置
         
         # 聊天管理
         self.chat_manager = ChatManager()
         self.chat_thread: Optional[threading.Thread] = None
         self.chat_response_pending = False
+        # (对局编号, 回复片段, 是否结束)；流式片段不能丢，所以不限长度（单条回复本身有长度上限）
+        self._chat_replies: Deque[Tuple[int, Optional[str], bool]] = deque()
+        self._chat_event = threading.Event()  # 有新回复时置位
+        self._chat_generation = 0  # 每次重新开局加一，用于丢弃上一局的回复
+        
+        # 后台计算AI落子（守护线程，同一时间最多一个请求），AI服务请求另开守护线程，超时后放弃等待
+        self._ai_future: Optional["concurrent.futures.Future[tuple]"] = None  # 结果为 (落子, 建议位置)
+        self._ai_pending = False
+        self._ai_spinner = 0
+        
+        # 界面状态变化时置位，主循环只在置位后重绘
+        self._dirty = True
+        self._last_paint = 0.0  # 上次刷新等待动画的时间（time.monotonic）
         
         # 日志
         self.logger = get_logger()
@@ -79,7 +171,8 @@ class GomokuGame:
             if self.difficulty == 'ai':
                 if self.ai_config.provider != AIProviderType.TRADITIONAL and self.ai_provider:
                     self.use_ai_service = True
-                    self.logger.info(f"AI对战模式: 使用 {self.ai_config.provider.value} - {self.ai_config.model}")
+                    self._provider_label = self.ai_config.provider.value
+                    self.logger.info("AI对战模式: 使用 %s - %s", self.ai_config.provider.value, self.ai_config.model)
                 else:
                     # AI服务未配置，提示用户
                     self.logger.warning("AI服务未配置，将降级到传统AI")
@@ -87,10 +180,10 @@ class GomokuGame:
             else:
                 # 传统AI模式：即使配置了AI服务也不用于下棋（但可用于聊天）
                 self.use_ai_service = False
-                self.logger.info(f"传统AI模式: {self.difficulty}")
+                self.logger.info("传统AI模式: %s", self.difficulty)
                 
         except Exception as e:
-            self.logger.error(f"初始化AI服务失败: {e}")
+            self.logger.error("初始化AI服务失败: %s", e)
             self.use_ai_service = False
 
     
@@ -102,87 +195,99 @@ class GomokuGame:
         except KeyboardInterrupt:
             pass
         except Exception as e:
-            self.logger.exception(f"游戏异常: {e}")
+            self.logger.exception("游戏异常: %s", e)
         finally:
+            # AI计算在守护线程中运行，退出时不等待；尚未开始的计算直接取消
+            if self._ai_future is not None:
+                self._ai_future.cancel()
             self.ui.cleanup()
+            close_logger()
     
     def _game_loop(self):
         """游戏主循环"""
-        show_help = False
-        need_redraw = True  # 标记是否需要重绘
-        
         # 使用阻塞式输入，避免反复刷新
         self.ui.stdscr.timeout(-1)
         
         while True:
-            # 只在需要时绘制界面
-            if need_redraw:
-                if show_help:
-                    self.ui.draw_help()
-                    show_help = False
-                    need_redraw = True
-                    continue
-                
+            # 退出聊天模式后才返回的回复
+            if self._drain_chat_replies():
+                self._dirty = True
+            
+            # 只在游戏或界面状态变化后绘制界面，空闲时不重绘
+            if self._dirty or self.ui.needs_redraw():
                 self._draw_game_state()
-                need_redraw = False
+                self._dirty = False
             
             # 游戏结束处理
             if self.game_over:
                 self.ui.draw_game_over(self.winner, self.board)
+                self.ui.commit()
                 
                 key = self.ui.get_input()
-                if key in [ord('q'), ord('Q')]:
+                if key in _KEY_QUIT:
                     break
-                elif key in [ord('r'), ord('R')]:
+                elif key in _KEY_RESTART:
                     self._reset_game()
-                    need_redraw = True
+                    self._dirty = True
                     continue
-                elif key in [ord('c'), ord('C')]:
+                elif key in _KEY_CHAT:
                     # 游戏结束后仍可聊天
                     self._handle_chat_mode()
-                    need_redraw = True
+                    self._dirty = True
+                elif key == curses.KEY_RESIZE:
+                    self._handle_resize()
+                    self._dirty = True
                 continue
             
             # 玩家回合
             if self.current_player == Board.BLACK:
+                old_cursor = self.ui.get_cursor_position()
                 action = self._handle_player_input()
                 
                 if action == 'quit':
                     break
                 elif action == 'restart':
                     self._reset_game()
-                    need_redraw = True
+                    self._dirty = True
                 elif action == 'help':
-                    show_help = True
-                    need_redraw = True
+                    # 帮助界面已在 _handle_player_input 中显示并关闭
+                    self._dirty = True
+                elif action == 'resize':
+                    self._handle_resize()
+                    self._dirty = True
                 elif action == 'chat':
                     self._handle_chat_mode()
-                    need_redraw = True
+                    self._dirty = True
                 elif action == 'move':
-                    need_redraw = True
-                    if self.board.last_move:
-                        row, col, _ = self.board.last_move
-                        if self.board.check_win(row, col):
-                            self.game_over = True
-                            self.winner = 'black'
-                            continue
+                    # 'move' 一定刚落过子，只需检查这一步
+                    self._dirty = True
+                    row, col, _ = self.board.last_move
+                    if self.board.move_count >= _MIN_WIN_PLIES and self.board.check_win(row, col):
+                        self.game_over = True
+                        self.winner = 'black'
+                        continue
                     
                     self.current_player = Board.WHITE
                     self.turn += 1
+                    self._check_draw()
                 elif action == 'cursor_move':
-                    # 光标移动需要重绘
-                    need_redraw = True
+                    # 光标移动只重绘两个格子和状态栏
+                    self._draw_cursor_move(old_cursor)
             
             # AI回合
             else:
-                self._handle_ai_turn()
-                need_redraw = True
-            
-            # 检查平局
-            if self.board.is_full() and not self.game_over:
-                self.game_over = True
-                self.winner = 'draw'
-                need_redraw = True
+                action = self._handle_ai_turn()
+                if action == 'quit':
+                    break
+                # 等待AI落子期间只刷新提示，不重绘整个界面
+                if action != 'pending':
+                    self._dirty = True
+    
+    def _check_draw(self):
+        """落子后检查平局（只有棋盘状态变化后才需要检查）"""
+        if not self.game_over and self.board.is_full():
+            self.game_over = True
+            self.winner = 'draw'
     
     def _handle_player_input(self):
         """处理玩家输入"""
@@ -191,124 +296,190 @@ class GomokuGame:
         if key == -1:  # 超时，无输入
             return None
         
-        # 退出
-        if key in [ord('q'), ord('Q')]:
-            return 'quit'
-        
-        # 重新开始
-        elif key in [ord('r'), ord('R')]:
-            return 'restart'
-        
-        # 帮助
-        elif key in [ord('h'), ord('H')]:
-            return 'help'
-        
-        # 聊天（始终可用，使用独立的终端输入界面）
-        elif key in [ord('c'), ord('C'), ord('/')]:
-            return 'chat'
+        entry = _KEY_DISPATCH.get(key)
+        if entry is None:
+            return None
+        kind, action = entry
         
         # 方向键移动
-        elif key == curses.KEY_UP or key in [ord('w'), ord('W')]:
-            self.ui.move_cursor('up', self.board.SIZE)
-            return 'cursor_move'
-        
-        elif key == curses.KEY_DOWN or key in [ord('s'), ord('S')]:
-            self.ui.move_cursor('down', self.board.SIZE)
-            return 'cursor_move'
-        
-        elif key == curses.KEY_LEFT or key in [ord('a'), ord('A')]:
-            self.ui.move_cursor('left', self.board.SIZE)
+        if kind == 'move':
+            self.ui.move_cursor(action, self.board.SIZE)
             return 'cursor_move'
         
-        elif key == curses.KEY_RIGHT or key in [ord('d'), ord('D')]:
-            self.ui.move_cursor('right', self.board.SIZE)
-            return 'cursor_move'
+        # 帮助
+        if action == 'help':
+            self.ui.show_help_modal()
         
         # 落子
-        elif key in [curses.KEY_ENTER, ord('\n'), ord('\r'), ord(' ')]:
+        elif action == 'place':
             row, col = self.ui.get_cursor_position()
             
             if self.board.place_stone(row, col, Board.BLACK):
+                self._update_board_row(row)
                 return 'move'
             else:
                 return 'invalid'
         
-        return None
+        # 退出 / 重新开始 / 帮助 / 聊天（聊天始终可用，使用独立的终端输入界面）
+        return action
     
     def _handle_ai_turn(self):
-        """处理AI回合"""
+        """
+        处理AI回合
+        
+        AI落子（AI服务的网络请求或传统AI搜索）在后台线程中计算，
+        主循环每次调用时轮询结果，期间界面保持响应（显示等待动画，可按 Q 退出）。
+        
+        Returns:
+            'pending' 仍在等待AI落子，'quit' 用户退出，'move' 本回合已结束
+        """
+        if not self._ai_pending:
+            self._start_ai_move()
+            return 'pending'
+        
+        try:
+            # 在结果上等待而不是在按键上等待：AI一算完立即落子
+            ai_move, suggested_move = self._ai_future.result(timeout=self._AI_POLL_INTERVAL)
+        except concurrent.futures.TimeoutError:
+            key = self.ui.get_input()  # 非阻塞
+            if key in _KEY_QUIT:
+                return 'quit'
+            if key == curses.KEY_RESIZE:
+                self._handle_resize()
+                self._draw_game_state()
+                self._last_paint = 0.0  # 立即重画等待提示
+            
+            # 按键会提前唤醒轮询，动画按时间而不是轮询次数推进
+            now = time.monotonic()
+            if now - self._last_paint >= self._SPINNER_INTERVAL:
+                self._last_paint = now
+                self._ai_spinner = (self._ai_spinner + 1) % len(self._SPINNER)
+                self.ui.show_ai_thinking(f"AI thinking... {self._SPINNER[self._ai_spinner]}")
+                self.ui.commit()
+            return 'pending'
+        
+        self._ai_pending = False
+        self.ui.stdscr.timeout(-1)  # 恢复阻塞式输入
+        self._ai_future = None
+        return self._apply_ai_move(ai_move, suggested_move)
+    
+    def _start_ai_move(self):
+        """提交后台AI落子计算，结果通过 _ai_future 获取"""
+        self._ai_pending = True
+        self._ai_spinner = 0
+        # 等待期间按键改为非阻塞读取，由 _handle_ai_turn 在结果上限时等待
+        self.ui.stdscr.timeout(0)
         self.ui.show_ai_thinking("AI thinking...")
-        time.sleep(0.3)
+        self.ui.commit()
+        self._last_paint = time.monotonic()
+        # 后台线程在局面副本上搜索，等待期间主线程仍可重绘棋盘（如窗口大小变化）
+        self._ai_future = _run_in_daemon_thread(
+            self._compute_ai_move, self.board.copy(), list(self._board_rows)
+        )
+    
+    def _compute_ai_move(self, board: Board, board_rows: List[str]):
+        """
+        计算AI落子（在后台线程中运行）
         
-        ai_move = None
+        Args:
+            board: 当前局面的副本，只在本线程中使用
+            board_rows: 预渲染棋盘行的快照
         
+        Returns:
+            (AI服务落子, 传统AI建议位置)，同 _get_ai_service_move
+        """
         if self.use_ai_service and self.ai_provider:
-            # 使用AI服务
-            ai_move = self._get_ai_service_move()
-        
+            return self._get_ai_service_move(board, board_rows)
+        # 传统AI模式：直接把搜索结果作为建议位置
+        return None, self.traditional_ai.get_move(board, Board.WHITE)
+    
+    def _apply_ai_move(self, ai_move, suggested_move):
+        """落下AI计算出的棋子并更新对局状态"""
         if ai_move is None:
-            # 降级到传统AI
-            ai_move = self.traditional_ai.get_move(self.board, Board.WHITE)
+            # 降级到传统AI：优先使用已经算好的建议位置
+            ai_move = suggested_move or self.traditional_ai.get_move(self.board, Board.WHITE)
             if ai_move:
-                self.logger.info(f"传统AI落子: {ai_move}")
+                self.logger.info("传统AI落子: %s", ai_move)
         
         if ai_move:
             row, col = ai_move
             self.board.place_stone(row, col, Board.WHITE)
+            self._update_board_row(row)
             
-            if self.board.check_win(row, col):
+            if self.board.move_count >= _MIN_WIN_PLIES and self.board.check_win(row, col):
                 self.game_over = True
                 self.winner = 'white'
-                return
+                return 'move'
             
             self.current_player = Board.BLACK
+            self._check_draw()
         else:
             # AI无法落子
             self.game_over = True
             self.winner = 'draw'
+        
+        return 'move'
+    
+    def _update_board_row(self, row: int):
+        """落子后重新渲染提示词中对应的棋盘行"""
+        self._board_rows[row + 1] = PromptBuilder.render_board_row(self.board.grid, row, Board.SIZE)
     
-    def _get_ai_service_move(self):
-        """从AI服务获取落子"""
+    def _get_ai_service_move(self, board: Board, board_rows: List[str]):
+        """
+        从AI服务获取落子
+        
+        Args:
+            board: 当前局面的副本（建议位置的搜索会在上面落子/悔棋）
+            board_rows: 预渲染棋盘行的快照
+        
+        Returns:
+            (AI服务落子, 传统AI建议位置)，失败的一项为 None；
+            AI服务失败时调用方可直接使用建议位置，无需再次搜索
+        """
         if not self.ai_provider:
-            return None
+            return None, None
         
+        suggested_move = None
         try:
-            # 构建历史记录
-            history = []
-            for move in self.board.history:
-                history.append((move[0], move[1], move[2]))
-            
             # 先用传统AI（中等难度）计算建议位置
-            from .ai import GomokuAI
-            traditional_ai = GomokuAI("medium")
-            suggested_move = traditional_ai.get_move(self.board, Board.WHITE)
+            suggested_move = self._suggest_ai.get_move(board, Board.WHITE)
             
             if suggested_move:
-                self.logger.info(f"传统AI建议位置: {suggested_move}")
+                self.logger.info("传统AI建议位置: %s", suggested_move)
             
             # 获取用户指令（如果有的话，从聊天历史中检查最近的指令）
             user_instruction = self._get_user_move_instruction()
             
-            # 调用AI服务，传入建议位置
-            result = self.ai_provider.get_move(
-                board=self.board.grid,
+            # 调用AI服务，传入建议位置；已有建议位置兜底，最多等待一次请求的超时时间
+            # （提供商内部的重试可能让总耗时成倍增加）。超时后请求线程无法取消，
+            # 因此只传快照，并给出截止时间让它不再继续重试
+            llm_future = _run_in_daemon_thread(
+                self.ai_provider.get_move,
+                board=board.grid,
                 current_player=Board.WHITE,
-                history=history,
-                board_size=self.board.SIZE,
+                history=board.history,  # 局面副本自己的历史，已是 (row, col, player) 列表
+                board_size=board.SIZE,
                 suggested_move=suggested_move,
-                user_instruction=user_instruction
+                user_instruction=user_instruction,
+                prerendered_board=board_rows,
+                deadline=time.monotonic() + self.ai_config.timeout
             )
+            try:
+                result = llm_future.result(timeout=self.ai_config.timeout)
+            except concurrent.futures.TimeoutError:
+                self.logger.warning("AI服务 %s 秒内未返回，改用传统AI建议位置", self.ai_config.timeout)
+                return None, suggested_move
             
             if result.result == MoveResult.SUCCESS:
-                self.logger.info(f"AI服务落子: ({result.row}, {result.col}), 理由: {result.reasoning}")
-                return (result.row, result.col)
+                self.logger.info("AI服务落子: (%d, %d), 理由: %s", result.row, result.col, result.reasoning)
+                return (result.row, result.col), suggested_move
             else:
-                self.logger.warning(f"AI服务落子失败: {result.result.value}, {result.error_message}")
-                return None
+                self.logger.warning("AI服务落子失败: %s, %s", result.result.value, result.error_message)
+                return None, suggested_move
                 
         except Exception as e:
-            self.logger.exception(f"AI服务调用异常: {e}")
-            return None
+            self.logger.exception("AI服务调用异常: %s", e)
+            return None, suggested_move
     
     def _get_user_move_instruction(self) -> Optional[str]:
         """
@@ -318,13 +489,9 @@ class GomokuGame:
         """
         recent_messages = self.chat_manager.get_recent_messages(3)
         for msg in reversed(recent_messages):
-            if msg.role == "user":
-                content = msg.content.lower()
-                # 检查是否包含落子指令关键词
-                keywords = ["下在", "走", "下", "落", "放", "move", "play"]
-                for kw in keywords:
-                    if kw in content:
-                        return msg.content
+            # 检查是否包含落子指令关键词
+            if msg.role == "user" and _MOVE_INSTR_RE.search(msg.content):
+                return msg.content
         return None
     
     def _handle_chat_mode(self):
@@ -333,40 +500,66 @@ class GomokuGame:
         
         保持棋盘显示，使用get_wch()支持中文输入
         """
-        import curses
-        
-        self.ui.set_input_mode(InputMode.CHAT)
+        ui = self.ui
+        stdscr = ui.stdscr
+        safe_addstr = ui.safe_addstr
+        clear_line = ui.clear_line
+        truncate_text = truncate_to_cols
+        set_input_cursor = ui.set_input_cursor
+        commit = ui.commit
+        
+        # 循环中不变的值提前计算
+        input_y = Board.SIZE + 10  # 在棋盘下方显示输入提示
+        terminal_width = ui.cols if hasattr(ui, 'cols') else 120
+        max_len = terminal_width - 1  # 截断以适应屏幕宽度
+        input_attr = curses.color_pair(ui.COLOR_INPUT) | curses.A_BOLD
+        hint_attr = curses.color_pair(ui.COLOR_BOARD)
+        enter_keys = ('\n', '\r', curses.KEY_ENTER)
+        backspace_keys = ('\x7f', '\b', curses.KEY_BACKSPACE, 8, 127)
+        
+        # 尝试使用 get_wch() 支持宽字符（中文），不支持时降级为 getch
+        get_wch = getattr(stdscr, 'get_wch', None)
+        
+        ui.set_input_mode(InputMode.CHAT)
         chat_input = ""
+        dirty = True  # 棋盘/聊天记录有变化时才整屏重绘
+        redraw_prompt = True  # 需要整行重绘输入提示
+        prompt_width = 0  # "聊天> " 加已输入内容的显示宽度，即输入光标所在列
         
         while True:
-            # 绘制当前状态
-            self._draw_game_state()
-            
-            # 在棋盘下方显示输入提示
-            from .board import Board
-            input_y = Board.SIZE + 10
+            if self._drain_chat_replies():
+                dirty = True
             
-            # 清除整行（使用更长的空格）
-            terminal_width = self.ui.cols if hasattr(self.ui, 'cols') else 120
-            self.ui.safe_addstr(input_y, 0, " " * (terminal_width - 1), curses.color_pair(self.ui.COLOR_BOARD))
+            # 只在状态变化后重绘整个界面
+            if dirty:
+                self._draw_game_state()
+                dirty = False
+                redraw_prompt = True
             
-            prompt = f"聊天> {chat_input}_"
-            # 截断以适应屏幕宽度
-            max_len = terminal_width - 1
-            display_prompt, _ = self.ui._truncate_text(prompt, max_len)
+            # 整行重绘输入提示；普通按键只写入变化的字符（见下方）
+            if redraw_prompt:
+                clear_line(input_y)
+                
+                prompt = f"聊天> {chat_input}"
+                prompt_width = sum(map(char_width, prompt))
+                # 末尾留一列给终端光标
+                display_prompt, display_width = truncate_text(prompt, max_len - 1)
+                
+                safe_addstr(input_y, 0, display_prompt, input_attr)
+                safe_addstr(input_y + 1, 0, "ESC退出 | Enter发送", hint_attr)
+                set_input_cursor(input_y, display_width)
+                commit()
+                redraw_prompt = False
             
-            self.ui.safe_addstr(input_y, 0, display_prompt, curses.color_pair(self.ui.COLOR_INPUT) | curses.A_BOLD)
-            self.ui.safe_addstr(input_y + 1, 0, "ESC退出 | Enter发送", curses.color_pair(self.ui.COLOR_BOARD))
-            self.ui.refresh()
+            # 等待回复时短超时轮询，否则阻塞等待按键
+            stdscr.timeout(50 if self.chat_response_pending else -1)
             
             # 获取输入（支持中文）
             try:
-                # 尝试使用 get_wch() 支持宽字符（中文）
-                try:
-                    ch = self.ui.stdscr.get_wch()
-                except AttributeError:
-                    # 如果不支持 get_wch，降级为 getch
-                    ch = self.ui.stdscr.getch()
+                if get_wch is not None:
+                    ch = get_wch()
+                else:
+                    ch = stdscr.getch()
                     if isinstance(ch, int) and ch != -1:
                         ch = chr(ch) if 32 <= ch <= 126 else ch
                 
@@ -374,74 +567,161 @@ class GomokuGame:
                 if ch == '\x1b' or ch == 27:
                     break
                 
+                # 终端大小变化
+                elif ch == curses.KEY_RESIZE:
+                    self._handle_resize()
+                    dirty = True
+                
                 # Enter 发送消息
-                elif ch in ['\n', '\r', curses.KEY_ENTER]:
+                elif ch in enter_keys:
+                    # 上一条回复返回前不发送新消息，保持对话顺序
+                    if self.chat_response_pending:
+                        continue
                     if chat_input.strip():
                         # 清空输入行后再发送
-                        self.ui.safe_addstr(input_y, 0, " " * (terminal_width - 1), curses.color_pair(self.ui.COLOR_BOARD))
+                        clear_line(input_y)
                         self._send_chat_in_ui(chat_input.strip())
+                        dirty = True
                     chat_input = ""
+                    redraw_prompt = True
                 
-                # Backspace 删除
-                elif ch in ['\x7f', '\b', curses.KEY_BACKSPACE, 8, 127]:
+                # Backspace 删除：光标左移，擦掉被删字符
+                elif ch in backspace_keys:
                     if chat_input:
+                        width = char_width(chat_input[-1])
                         chat_input = chat_input[:-1]
+                        if prompt_width + 1 > max_len:
+                            # 之前超出屏幕被截断，整行重绘
+                            redraw_prompt = True
+                        else:
+                            prompt_width -= width
+                            safe_addstr(input_y, prompt_width, " " * width, input_attr)
+                            set_input_cursor(input_y, prompt_width)
+                            commit()
                 
-                # 普通字符（包括中文）
+                # 普通字符（包括中文）：在光标处写入新字符，光标后移
                 elif isinstance(ch, str) and len(ch) == 1 and ord(ch) >= 32:
                     chat_input += ch
+                    width = char_width(ch)
+                    if prompt_width + width + 1 <= max_len:
+                        safe_addstr(input_y, prompt_width, ch, input_attr)
+                        prompt_width += width
+                        set_input_cursor(input_y, prompt_width)
+                        commit()
+                    else:
+                        redraw_prompt = True
                     
             except curses.error:
                 pass
             except Exception as e:
-                self.logger.error(f"聊天输入错误: {e}")
+                self.logger.error("聊天输入错误: %s", e)
                 break
         
-        self.ui.set_input_mode(InputMode.GAME)
+        ui.set_input_mode(InputMode.GAME)
     
     def _send_chat_in_ui(self, message: str):
-        """在UI中发送聊天消息并显示回复"""
-        import curses
-        from .board import Board
+        """
+        在UI中发送聊天消息
         
+        AI回复在后台线程中请求，完成后由 _drain_chat_replies 取回显示，
+        等待期间仍可继续输入
+        """
         # 添加用户消息
         self.chat_manager.add_user_message(message)
         
+        if not self.ai_provider:  # 只要有AI provider就可以聊天
+            self.chat_manager.add_assistant_message("AI服务未配置。请运行 'gomoku --config' 进行配置。")
+            self._update_chat_display()
+            return
+        
         # 显示等待提示
-        input_y = Board.SIZE + 10
-        terminal_width = self.ui.cols if hasattr(self.ui, 'cols') else 120
-        self.ui.safe_addstr(input_y, 0, " " * (terminal_width - 1), curses.color_pair(self.ui.COLOR_BOARD))
-        self.ui.safe_addstr(input_y, 0, "AI思考中...", curses.color_pair(self.ui.COLOR_CHAT_AI))
-        self.ui.refresh()
+        self.chat_response_pending = True
+        self.ui.set_ai_typing(True)
+        self._update_chat_display()
         
-        # 发送到AI
-        if self.ai_provider:  # 只要有AI provider就可以聊天
-            try:
-                response = self.ai_provider.chat(
-                    message=message,
-                    chat_history=self.chat_manager.get_history()[:-1],
-                    board=self.board.board,
-                    current_player=self.current_player,
-                    board_history=self.board.history  # 传递落子历史
-                )
+        # 在主线程中取快照，后台线程不直接读取会变化的游戏状态
+        self.chat_thread = threading.Thread(
+            target=self._chat_worker,
+            kwargs=dict(
+                generation=self._chat_generation,
+                message=message,
+                chat_history=self.chat_manager.api_messages_excluding_last(),
+                board=PromptBuilder.flatten_board(self.board.board, Board.SIZE),  # 扁平字节副本
+                current_player=self.current_player,
+                board_history=self.board.history[-10:],  # 提示词只用最近10步，无需复制全部历史
+                prerendered_board=list(self._board_rows)
+            ),
+            daemon=True
+        )
+        self.chat_thread.start()
+    
+    def _chat_worker(self, generation: int, **chat_kwargs):
+        """
+        后台线程：以流式方式请求AI聊天回复，片段和最终结果放入 _chat_replies 并唤醒界面
+        
+        单生产者/单消费者：deque 的 append/popleft 是线程安全的，无需额外加锁
+        """
+        streamed = False
+        
+        def on_token(text: str):
+            nonlocal streamed
+            streamed = True
+            self._chat_replies.append((generation, text, False))
+            self._chat_event.set()
+        
+        try:
+            response = self.ai_provider.chat(on_token=on_token, **chat_kwargs)
+            
+            if response.success:
+                # 已经逐段显示过的回复不再重复发送
+                ai_reply = None if streamed else response.content
+                self.logger.info("聊天回复: %.50s...", response.content)
+            else:
+                ai_reply = f"错误: {response.error_message}"
+                self.logger.error("聊天失败: %s", response.error_message)
                 
-                if response.success:
-                    ai_reply = response.content
-                    self.logger.info(f"聊天回复: {ai_reply[:50]}...")
-                else:
-                    ai_reply = f"错误: {response.error_message}"
-                    self.logger.error(f"聊天失败: {response.error_message}")
-                    
-            except Exception as e:
-                ai_reply = "抱歉，无法连接到AI服务"
-                self.logger.exception(f"聊天异常: {e}")
-        else:
-            ai_reply = "AI服务未配置。请运行 'gomoku --config' 进行配置。"
+        except Exception as e:
+            ai_reply = "抱歉，无法连接到AI服务"
+            self.logger.exception("聊天异常: %s", e)
         
-        self.chat_manager.add_assistant_message(ai_reply)
+        self._chat_replies.append((generation, ai_reply, True))
+        self._chat_event.set()
+    
+    def _drain_chat_replies(self) -> bool:
+        """
+        取回后台线程完成的聊天回复
         
-        # 更新聊天显示
-        self._update_chat_display()
+        Returns:
+            是否有新回复（需要重绘）
+        """
+        if not self._chat_event.is_set():
+            return False
+        
+        self._chat_event.clear()
+        got_reply = False
+        finished = False
+        while self._chat_replies:
+            generation, ai_reply, done = self._chat_replies.popleft()
+            # 重新开局前发出的请求，回复直接丢弃
+            if generation != self._chat_generation:
+                continue
+            if not done:
+                # 流式片段追加到正在显示的回复后面
+                self.chat_manager.append_to_last_assistant(ai_reply)
+            elif ai_reply is not None:
+                self.chat_manager.add_assistant_message(ai_reply)
+            got_reply = True
+            finished = finished or done
+        
+        if finished:
+            # 同一时间只有一条当前对局的请求在进行
+            self.chat_response_pending = False
+            self.ui.set_ai_typing(False)
+        
+        # 只更新聊天显示的状态，由调用方统一重绘一次；只有上一局的过期回复时无需重绘
+        if got_reply:
+            self._update_chat_display()
+        return got_reply
     
     def _handle_chat_input(self) -> bool:
         """
@@ -462,7 +742,7 @@ class GomokuGame:
             return True
         
         # Enter发送消息
-        elif key in [curses.KEY_ENTER, ord('\n'), ord('\r')]:
+        elif key in _KEY_SEND:
             message = self.ui.get_chat_input()
             if message.strip():
                 self._send_chat_message(message.strip())
@@ -495,21 +775,22 @@ class GomokuGame:
             try:
                 response = self.ai_provider.chat(
                     message=message,
-                    chat_history=self.chat_manager.get_history()[:-1],  # 不包含刚添加的消息
+                    chat_history=self.chat_manager.api_messages_excluding_last(),  # 不包含刚添加的消息
                     board=self.board.board,
-                    current_player=self.current_player
+                    current_player=self.current_player,
+                    prerendered_board=self._board_rows
                 )
                 
                 if response.success:
                     self.chat_manager.add_assistant_message(response.content)
-                    self.logger.info(f"聊天回复: {response.content[:50]}...")
+                    self.logger.info("聊天回复: %.50s...", response.content)
                 else:
                     self.chat_manager.add_assistant_message(f"抱歉，出现错误: {response.error_message}")
-                    self.logger.error(f"聊天失败: {response.error_message}")
+                    self.logger.error("聊天失败: %s", response.error_message)
                     
             except Exception as e:
                 self.chat_manager.add_assistant_message("抱歉，无法连接到AI服务")
-                self.logger.exception(f"聊天异常: {e}")
+                self.logger.exception("聊天异常: %s", e)
         else:
             # 无AI服务，使用默认回复
             self.chat_manager.add_assistant_message("AI服务未配置。请设置环境变量 AI_PROVIDER 和 AI_API_KEY")
@@ -517,6 +798,12 @@ class GomokuGame:
         self.ui.set_ai_typing(False)
         self._update_chat_display()
     
+    def _handle_resize(self):
+        """终端大小变化：更新界面尺寸，并按新的聊天区域宽度重新换行"""
+        self.ui.handle_resize()
+        if self.ui.is_chat_enabled():
+            self._update_chat_display()
+    
     def _update_chat_display(self):
         """更新聊天显示"""
         formatted = self.chat_manager.format_for_display(self.ui.chat_width - 8)
@@ -526,26 +813,36 @@ class GomokuGame:
         """绘制当前游戏状态"""
         last_move = self.board.last_move[:2] if self.board.last_move else None
         self.ui.draw_board(self.board, last_move)
-        
-        # 构建游戏状态
+        self.ui.draw_status(self._build_game_state())
+        self.ui.draw_controls()
+        self.ui.commit()
+    
+    def _draw_cursor_move(self, old_cursor):
+        """光标移动后的增量重绘：只更新新旧光标格子和状态栏"""
+        last_move = self.board.last_move[:2] if self.board.last_move else None
+        self.ui.draw_cursor_move(old_cursor, self.board, last_move)
+        self.ui.draw_status(self._build_game_state())
+        self.ui.commit()
+    
+    def _build_game_state(self):
+        """构建状态栏所需的游戏状态"""
         game_state = {
             'difficulty': self.difficulty,
             'turn': self.turn,
-            'current_player': 'black' if self.current_player == Board.BLACK else 'white',
+            'current_player': _PLAYER_STR[self.current_player],
             'message': ''
         }
         
         # 添加AI提供商信息
-        if self.use_ai_service and self.ai_config:
-            game_state['ai_provider'] = f"{self.ai_config.provider.value}"
+        if self._provider_label:
+            game_state['ai_provider'] = self._provider_label
         
-        self.ui.draw_status(game_state)
-        self.ui.draw_controls()
-        self.ui.refresh()
+        return game_state
     
     def _reset_game(self):
         """重置游戏"""
         self.board.reset()
+        self._board_rows = PromptBuilder.render_board_rows(self.board.grid, Board.SIZE)
         self.ui.reset_cursor()
         self.ui.set_input_mode(InputMode.GAME)
         self.current_player = Board.BLACK
@@ -553,8 +850,11 @@ class GomokuGame:
         self.winner = None
         self.turn = 0
         
-        # 清空聊天历史
+        # 清空聊天历史，尚未返回的回复作废
         self.chat_manager.clear_history()
         self.ui.clear_chat()
+        self._chat_generation += 1
+        self.chat_response_pending = False
+        self.ui.set_ai_typing(False)
         
         self.logger.info("游戏重置")
@@ -1,87 +1,94 @@
 """
 日志记录模块
 
-提供统一的日志记录功能
+提供统一的日志记录功能：日志写入文件，不影响终端显示。
+游戏线程只把日志放入队列，由后台 QueueListener 线程写文件。
 """
 
-import os
+import atexit
 import logging
+import logging.handlers
+import queue
 from datetime import datetime
 from pathlib import Path
 
 
-class GomokuLogger:
-    """
-    五子棋游戏日志记录器
+_LOGGER_NAME = "gomoku"
+
+# 日志格式只用到时间、级别和消息，不必为每条记录收集线程/进程信息
+logging.logThreads = False
+logging.logProcesses = False
+logging.logMultiprocessing = False
+
+# 后台写日志线程及其文件处理器，_configure 首次调用时创建
+_listener = None
+_file_handler = None
+
+
+def _configure() -> logging.Logger:
+    """配置 gomoku 日志记录器（只在第一次调用时添加处理器）"""
+    global _listener, _file_handler
     
-    将日志写入文件，不影响终端显示
-    """
+    log = logging.getLogger(_LOGGER_NAME)
+    
+    # 避免重复添加handler
+    if log.handlers:
+        return log
     
-    _instance = None
-    _initialized = False
+    log.setLevel(logging.DEBUG)
     
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-        return cls._instance
+    # 创建日志目录
+    log_dir = Path.home() / ".gomoku" / "logs"
+    log_dir.mkdir(parents=True, exist_ok=True)
     
-    def __init__(self):
-        if GomokuLogger._initialized:
-            return
-        
-        GomokuLogger._initialized = True
-        
-        # 创建日志目录
-        log_dir = Path.home() / ".gomoku" / "logs"
-        log_dir.mkdir(parents=True, exist_ok=True)
-        
-        # 日志文件路径
-        log_file = log_dir / f"gomoku_{datetime.now().strftime('%Y%m%d')}.log"
-        
-        # 配置日志
-        self.logger = logging.getLogger("gomoku")
-        self.logger.setLevel(logging.DEBUG)
-        
-        # 避免重复添加handler
-        if not self.logger.handlers:
-            # 文件处理器
-            file_handler = logging.FileHandler(log_file, encoding='utf-8')
-            file_handler.setLevel(logging.DEBUG)
-            
-            # 日志格式
-            formatter = logging.Formatter(
-                '%(asctime)s - %(levelname)s - %(message)s',
-                datefmt='%Y-%m-%d %H:%M:%S'
-            )
-            file_handler.setFormatter(formatter)
-            
-            self.logger.addHandler(file_handler)
+    # 日志文件路径
+    log_file = log_dir / f"gomoku_{datetime.now().strftime('%Y%m%d')}.log"
     
-    def debug(self, message: str):
-        """记录调试信息"""
-        self.logger.debug(message)
+    # 文件处理器
+    file_handler = logging.FileHandler(log_file, encoding='utf-8')
+    file_handler.setLevel(logging.DEBUG)
     
-    def info(self, message: str):
-        """记录一般信息"""
-        self.logger.info(message)
+    # 日志格式
+    formatter = logging.Formatter(
+        '%(asctime)s - %(levelname)s - %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+    file_handler.setFormatter(formatter)
     
-    def warning(self, message: str):
-        """记录警告信息"""
-        self.logger.warning(message)
+    # 写文件交给后台线程，记录日志时不阻塞游戏线程
+    log_queue = queue.Queue(-1)
+    log.addHandler(logging.handlers.QueueHandler(log_queue))
+    _file_handler = file_handler
+    _listener = logging.handlers.QueueListener(log_queue, file_handler)
+    _listener.start()
+    atexit.register(close_logger)
+    return log
+
+
+def close_logger():
+    """
+    停止后台写日志线程（写完队列中剩余的日志）
     
-    def error(self, message: str):
-        """记录错误信息"""
-        self.logger.error(message)
+    之后的日志直接同步写入文件；可重复调用
+    """
+    global _listener
     
-    def exception(self, message: str):
-        """记录异常信息（包含堆栈）"""
-        self.logger.exception(message)
+    if _listener is None:
+        return
+    
+    _listener.stop()
+    _listener = None
+    log = logging.getLogger(_LOGGER_NAME)
+    for handler in list(log.handlers):
+        if isinstance(handler, logging.handlers.QueueHandler):
+            log.removeHandler(handler)
+    log.addHandler(_file_handler)
 
 
-# 全局日志实例
-logger = GomokuLogger()
+def get_logger() -> logging.Logger:
+    """获取日志记录器（标准库 Logger，首次调用时完成配置）"""
+    return _configure()
 
 
-def get_logger() -> GomokuLogger:
-    """获取日志记录器实例"""
-    return logger
+# 全局日志实例
+logger = get_logger()
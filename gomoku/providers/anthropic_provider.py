@@ -4,16 +4,28 @@ Anthropic AI提供商实现
 使用Anthropic Claude API进行五子棋对战和聊天
 """
 
-from typing import List, Tuple, Optional
+from typing import Callable, List, Tuple, Optional
 import time
 
 from gomoku.ai_provider import (
     AIProvider, AIMove, MoveResult,
-    ChatMessage, ChatResponse,
-    PromptBuilder, ResponseParser
+    ChatHistoryItem, ChatResponse, BoardData,
+    PromptBuilder, ResponseParser, retry_delay, request_timeout
 )
 from gomoku.config import AIConfig
 
+try:
+    from anthropic import (
+        APITimeoutError, AuthenticationError, BadRequestError,
+        NotFoundError, PermissionDeniedError
+    )
+    # 重试也不会成功的错误（密钥无效、参数错误、模型不存在等）
+    _FATAL_ERRORS = (AuthenticationError, BadRequestError, NotFoundError, PermissionDeniedError)
+    _TIMEOUT_ERRORS = (APITimeoutError,)
+except ImportError:  # 未安装时由 _init_client 提示
+    _FATAL_ERRORS = ()
+    _TIMEOUT_ERRORS = ()
+
 
 class AnthropicProvider(AIProvider):
     """
@@ -31,6 +43,7 @@ class AnthropicProvider(AIProvider):
         """
         self.config = config
         self._client = None
+        self._move_client = None  # 落子请求使用的客户端（重试由 get_move 自己控制）
         self._init_client()
     
     def _init_client(self):
@@ -43,6 +56,8 @@ class AnthropicProvider(AIProvider):
                 kwargs["base_url"] = self.config.endpoint
             
             self._client = Anthropic(**kwargs)
+            # 落子请求已有自己的重试循环，关闭SDK内部重试避免重复等待
+            self._move_client = self._client.with_options(max_retries=0)
         except ImportError:
             raise ImportError(
                 "Anthropic库未安装，请运行: pip install anthropic"
@@ -67,25 +82,42 @@ class AnthropicProvider(AIProvider):
     
     def get_move(
         self,
-        board: List[List[int]],
+        board: BoardData,
         current_player: int,
         history: List[Tuple[int, int, int]],
-        board_size: int = 15
+        board_size: int = 20,
+        suggested_move: Optional[Tuple[int, int]] = None,
+        user_instruction: Optional[str] = None,
+        prerendered_board: Optional[List[str]] = None,
+        deadline: Optional[float] = None
     ) -> AIMove:
         """获取AI的下一步落子"""
+        # 统一为扁平字节序列，后续取格子只需一次字节索引
+        board = PromptBuilder.flatten_board(board, board_size)
         prompt = PromptBuilder.build_move_prompt(
-            board, current_player, history, board_size
+            board=board,
+            current_player=current_player,
+            history=history,
+            board_size=board_size,
+            suggested_move=suggested_move,
+            user_instruction=user_instruction,
+            prerendered_board=prerendered_board
         )
         
         system_prompt = "你是一个专业的五子棋AI。请分析棋局并给出最佳落子位置。"
         
         for attempt in range(self.config.max_retries):
+            timeout = request_timeout(self.config.timeout, deadline)
+            if timeout <= 0:
+                # 调用方已不再等待结果，停止重试
+                break
             try:
-                response = self._client.messages.create(
+                response = self._move_client.messages.create(
                     model=self.config.model,
                     max_tokens=200,
                     system=system_prompt,
-                    messages=[{"role": "user", "content": prompt}]
+                    messages=[{"role": "user", "content": prompt}],
+                    timeout=timeout
                 )
                 
                 content = response.content[0].text
@@ -94,7 +126,7 @@ class AnthropicProvider(AIProvider):
                 if result:
                     row, col, reasoning = result
                     # 验证位置是否为空
-                    if board[row][col] == 0:
+                    if board[row * board_size + col] == 0:
                         return AIMove(
                             row=row,
                             col=col,
@@ -108,16 +140,32 @@ class AnthropicProvider(AIProvider):
                     # 解析失败，继续重试
                     continue
                     
+            except _FATAL_ERRORS as e:
+                return AIMove(
+                    row=-1,
+                    col=-1,
+                    result=MoveResult.API_ERROR,
+                    error_message=str(e)
+                )
             except Exception as e:
-                if attempt == self.config.max_retries - 1:
+                # 限流、超时、网络或服务端错误：指数退避后重试
+                if (attempt == self.config.max_retries - 1
+                        or request_timeout(self.config.timeout, deadline) <= retry_delay(attempt)):
                     return AIMove(
                         row=-1,
                         col=-1,
-                        result=MoveResult.API_ERROR,
+                        result=MoveResult.TIMEOUT if isinstance(e, _TIMEOUT_ERRORS) else MoveResult.API_ERROR,
                         error_message=str(e)
                     )
-                time.sleep(1)  # 重试前等待
+                time.sleep(retry_delay(attempt))
         
+        if request_timeout(self.config.timeout, deadline) <= 0:
+            return AIMove(
+                row=-1,
+                col=-1,
+                result=MoveResult.TIMEOUT,
+                error_message="超过截止时间"
+            )
         return AIMove(
             row=-1,
             col=-1,
@@ -128,24 +176,21 @@ class AnthropicProvider(AIProvider):
     def chat(
         self,
         message: str,
-        chat_history: List[ChatMessage],
-        board: Optional[List[List[int]]] = None,
-        current_player: Optional[int] = None
+        chat_history: List[ChatHistoryItem],
+        board: Optional[BoardData] = None,
+        current_player: Optional[int] = None,
+        board_history: Optional[List[Tuple[int, int, int]]] = None,
+        prerendered_board: Optional[List[str]] = None,
+        on_token: Optional[Callable[[str], None]] = None
     ) -> ChatResponse:
         """与AI进行对话"""
         try:
-            system_prompt = PromptBuilder.build_chat_prompt(
-                board, current_player
+            system_prompt = self._chat_system_prompt(
+                board, current_player, board_history, prerendered_board
             )
             
-            messages = []
-            
-            # 添加聊天历史
-            for msg in chat_history[-10:]:  # 最多保留最近10条
-                messages.append({
-                    "role": msg.role,
-                    "content": msg.content
-                })
+            # 聊天历史（最多保留最近10条，已是API格式的消息直接复用）
+            messages = PromptBuilder.history_messages(chat_history)
             
             # 添加当前消息
             messages.append({"role": "user", "content": message})
@@ -154,11 +199,21 @@ class AnthropicProvider(AIProvider):
                 model=self.config.model,
                 max_tokens=150,
                 system=system_prompt,
-                messages=messages
+                messages=messages,
+                stream=on_token is not None
             )
             
-            content = response.content[0].text
-            return ChatResponse(content=content, success=True)
+            if on_token is None:
+                content = response.content[0].text
+                return ChatResponse(content=content, success=True)
+            
+            # 流式回复：只关心文本增量事件
+            parts = []
+            for event in response:
+                if event.type == "content_block_delta" and event.delta.type == "text_delta":
+                    parts.append(event.delta.text)
+                    on_token(event.delta.text)
+            return ChatResponse(content="".join(parts), success=True)
             
         except Exception as e:
             return ChatResponse(
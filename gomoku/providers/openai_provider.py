@@ -4,16 +4,28 @@ OpenAI AI提供商实现
 使用OpenAI API进行五子棋对战和聊天
 """
 
-from typing import List, Tuple, Optional
+from typing import Callable, List, Tuple, Optional
 import time
 
 from gomoku.ai_provider import (
     AIProvider, AIMove, MoveResult,
-    ChatMessage, ChatResponse,
-    PromptBuilder, ResponseParser
+    ChatHistoryItem, ChatResponse, BoardData,
+    PromptBuilder, ResponseParser, retry_delay, request_timeout
 )
 from gomoku.config import AIConfig
 
+try:
+    from openai import (
+        APITimeoutError, AuthenticationError, BadRequestError,
+        NotFoundError, PermissionDeniedError
+    )
+    # 重试也不会成功的错误（密钥无效、参数错误、模型不存在等）
+    _FATAL_ERRORS = (AuthenticationError, BadRequestError, NotFoundError, PermissionDeniedError)
+    _TIMEOUT_ERRORS = (APITimeoutError,)
+except ImportError:  # 未安装时由 _init_client 提示
+    _FATAL_ERRORS = ()
+    _TIMEOUT_ERRORS = ()
+
 
 class OpenAIProvider(AIProvider):
     """
@@ -31,6 +43,7 @@ class OpenAIProvider(AIProvider):
         """
         self.config = config
         self._client = None
+        self._move_client = None  # 落子请求使用的客户端（重试由 get_move 自己控制）
         self._init_client()
     
     def _init_client(self):
@@ -42,12 +55,36 @@ class OpenAIProvider(AIProvider):
             if self.config.endpoint:
                 kwargs["base_url"] = self.config.endpoint
             
+            http_client = self._make_http_client()
+            if http_client is not None:
+                kwargs["http_client"] = http_client
+            
             self._client = OpenAI(**kwargs)
+            # 落子请求已有自己的重试循环，关闭SDK内部重试避免重复等待
+            self._move_client = self._client.with_options(max_retries=0)
         except ImportError:
             raise ImportError(
                 "OpenAI库未安装，请运行: pip install openai"
             )
     
+    def _make_http_client(self):
+        """
+        创建长连接复用的 httpx 客户端，落子重试和聊天请求共用连接，省去重复握手
+        
+        安装了 h2 时启用 HTTP/2；httpx 不可用时返回 None，使用SDK默认客户端
+        """
+        try:
+            import httpx
+        except ImportError:
+            return None
+        
+        limits = httpx.Limits(max_keepalive_connections=4, keepalive_expiry=60.0)
+        try:
+            return httpx.Client(http2=True, limits=limits, timeout=self.config.timeout)
+        except ImportError:
+            # 未安装 h2
+            return httpx.Client(limits=limits, timeout=self.config.timeout)
+    
     @property
     def provider_name(self) -> str:
         return "OpenAI"
@@ -68,37 +105,49 @@ class OpenAIProvider(AIProvider):
     
     def get_move(
         self,
-        board: List[List[int]],
+        board: BoardData,
         current_player: int,
         history: List[Tuple[int, int, int]],
         board_size: int = 20,
         suggested_move: Optional[Tuple[int, int]] = None,
-        user_instruction: Optional[str] = None
+        user_instruction: Optional[str] = None,
+        prerendered_board: Optional[List[str]] = None,
+        deadline: Optional[float] = None
     ) -> AIMove:
         """获取AI的下一步落子"""
+        # 统一为扁平字节序列，后续取格子只需一次字节索引
+        board = PromptBuilder.flatten_board(board, board_size)
         prompt = PromptBuilder.build_move_prompt(
             board=board,
             current_player=current_player,
             history=history,
             board_size=board_size,
             suggested_move=suggested_move,
-            user_instruction=user_instruction
+            user_instruction=user_instruction,
+            prerendered_board=prerendered_board
         )
         
+        # 重试时提示词不变，消息列表只构建一次
+        messages = [
+            {
+                "role": "system",
+                "content": "你是一个专业的五子棋AI。请分析棋局并给出最佳落子位置。"
+            },
+            {"role": "user", "content": prompt}
+        ]
+        
         for attempt in range(self.config.max_retries):
+            timeout = request_timeout(self.config.timeout, deadline)
+            if timeout <= 0:
+                # 调用方已不再等待结果，停止重试
+                break
             try:
-                response = self._client.chat.completions.create(
+                response = self._move_client.chat.completions.create(
                     model=self.config.model,
-                    messages=[
-                        {
-                            "role": "system",
-                            "content": "你是一个专业的五子棋AI。请分析棋局并给出最佳落子位置。"
-                        },
-                        {"role": "user", "content": prompt}
-                    ],
+                    messages=messages,
                     max_tokens=200,
                     temperature=0.3,
-                    timeout=self.config.timeout
+                    timeout=timeout
                 )
                 
                 content = response.choices[0].message.content
@@ -107,7 +156,7 @@ class OpenAIProvider(AIProvider):
                 if result:
                     row, col, reasoning = result
                     # 验证位置是否为空
-                    if board[row][col] == 0:
+                    if board[row * board_size + col] == 0:
                         return AIMove(
                             row=row,
                             col=col,
@@ -121,16 +170,32 @@ class OpenAIProvider(AIProvider):
                     # 解析失败，继续重试
                     continue
                     
+            except _FATAL_ERRORS as e:
+                return AIMove(
+                    row=-1,
+                    col=-1,
+                    result=MoveResult.API_ERROR,
+                    error_message=str(e)
+                )
             except Exception as e:
-                if attempt == self.config.max_retries - 1:
+                # 限流、超时、网络或服务端错误：指数退避后重试
+                if (attempt == self.config.max_retries - 1
+                        or request_timeout(self.config.timeout, deadline) <= retry_delay(attempt)):
                     return AIMove(
                         row=-1,
                         col=-1,
-                        result=MoveResult.API_ERROR,
+                        result=MoveResult.TIMEOUT if isinstance(e, _TIMEOUT_ERRORS) else MoveResult.API_ERROR,
                         error_message=str(e)
                     )
-                time.sleep(1)  # 重试前等待
+                time.sleep(retry_delay(attempt))
         
+        if request_timeout(self.config.timeout, deadline) <= 0:
+            return AIMove(
+                row=-1,
+                col=-1,
+                result=MoveResult.TIMEOUT,
+                error_message="超过截止时间"
+            )
         return AIMove(
             row=-1,
             col=-1,
@@ -141,28 +206,22 @@ class OpenAIProvider(AIProvider):
     def chat(
         self,
         message: str,
-        chat_history: List[ChatMessage],
-        board: Optional[List[List[int]]] = None,
+        chat_history: List[ChatHistoryItem],
+        board: Optional[BoardData] = None,
         current_player: Optional[int] = None,
-        board_history: Optional[List[Tuple[int, int, int]]] = None
+        board_history: Optional[List[Tuple[int, int, int]]] = None,
+        prerendered_board: Optional[List[str]] = None,
+        on_token: Optional[Callable[[str], None]] = None
     ) -> ChatResponse:
         """与AI进行对话"""
         try:
-            system_prompt = PromptBuilder.build_chat_prompt(
-                board=board,
-                current_player=current_player,
-                history=board_history,
-                board_size=20
+            system_prompt = self._chat_system_prompt(
+                board, current_player, board_history, prerendered_board
             )
             
+            # 系统提示词 + 聊天历史（最多保留最近10条，已是API格式的消息直接复用）
             messages = [{"role": "system", "content": system_prompt}]
-            
-            # 添加聊天历史
-            for msg in chat_history[-10:]:  # 最多保留最近10条
-                messages.append({
-                    "role": msg.role,
-                    "content": msg.content
-                })
+            messages.extend(PromptBuilder.history_messages(chat_history))
             
             # 添加当前消息
             messages.append({"role": "user", "content": message})
@@ -172,11 +231,24 @@ class OpenAIProvider(AIProvider):
                 messages=messages,
                 max_tokens=150,
                 temperature=0.7,
-                timeout=self.config.timeout
+                timeout=self.config.timeout,
+                stream=on_token is not None
             )
             
-            content = response.choices[0].message.content
-            return ChatResponse(content=content, success=True)
+            if on_token is None:
+                content = response.choices[0].message.content
+                return ChatResponse(content=content, success=True)
+            
+            # 流式回复：边接收边回调，最后返回完整内容
+            parts = []
+            for chunk in response:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    parts.append(delta)
+                    on_token(delta)
+            return ChatResponse(content="".join(parts), success=True)
             
         except Exception as e:
             return ChatResponse(
@@ -10,9 +10,45 @@ except ImportError:
     print("Windows用户请运行: pip install windows-curses")
     sys.exit(1)
 
-from typing import List, Optional, Tuple
+import functools
+import itertools
+import unicodedata
+from collections import deque
+from typing import Deque, List, Optional, Tuple
 from enum import Enum
 
+from .board import Board
+
+
+@functools.lru_cache(maxsize=4096)
+def char_width(char):
+    """获取字符的显示宽度（聊天文字中的字符大量重复，结果缓存）"""
+    # 'F' (Fullwidth), 'W' (Wide), 'A' (Ambiguous) 通常视为2
+    # 'N' (Neutral), 'Na' (Narrow), 'H' (Halfwidth) 视为1
+    # 注意：Ambiguous 在某些终端可能是1，但在中文环境通常是2
+    return 2 if unicodedata.east_asian_width(char) in ('F', 'W', 'A') else 1
+
+
+def truncate_to_cols(text, cols):
+    """
+    按显示宽度截断文本
+    
+    Returns:
+        (截断后的文本, 其显示宽度)
+    """
+    width = 0
+    for i, char in enumerate(text):
+        cw = char_width(char)
+        if width + cw > cols:
+            return text[:i], width
+        width += cw
+    return text, width
+
+
+# 聊天消息角色，添加消息时由字符串转换为下标，绘制时直接查表
+ROLE_USER = 0
+ROLE_AI = 1
+
 
 class InputMode(Enum):
     """输入模式枚举"""
@@ -34,6 +70,11 @@ class GomokuUI:
     COLOR_CHAT_AI = 8
     COLOR_CHAT_BORDER = 9
     COLOR_INPUT = 10
+    COLOR_CURSOR_ON_BLACK = 11
+    COLOR_CURSOR_ON_WHITE = 12
+    
+    # 聊天角色 -> (行首前缀, 颜色对)，按 ROLE_USER / ROLE_AI 下标取值
+    _ROLE_TABLE = (("You: ", COLOR_CHAT_USER), ("AI: ", COLOR_CHAT_AI))
     
     # 显示符号
     SYMBOL_EMPTY = '+'
@@ -46,6 +87,48 @@ class GomokuUI:
     BOARD_START_Y = 2
     CHAT_MIN_WIDTH = 35
     CHAT_MAX_WIDTH = 45
+    CHAT_MAX_MESSAGES = 200  # 聊天区域保留的消息条数
+    CHAT_MAX_LINES = 200     # 展开后的显示行数上限，远大于聊天区域高度
+    
+    # 列号字母（A、B、C...），按列下标取值
+    _COL_LETTERS = tuple(chr(65 + i) for i in range(Board.SIZE))
+    
+    # 状态栏中的难度名称
+    _DIFFICULTY_TEXT = {
+        'easy': 'Easy',
+        'medium': 'Medium',
+        'hard': 'Hard',
+        'ai': 'AI'
+    }
+    
+    # 帮助界面内容，前3行为标题
+    _HELP_TEXT = (
+        "=======================================",
+        "        Gomoku Game Help",
+        "=======================================",
+        "",
+        "Goal:",
+        "  Form 5 consecutive stones in a row",
+        "",
+        "Controls:",
+        "  Arrow Keys/WASD - Move cursor",
+        "  Enter/Space     - Place stone",
+        "  C - Open chat with AI",
+        "  Q - Quit game",
+        "  R - Restart",
+        "  H - Show/Hide help",
+        "",
+        "Chat Mode:",
+        "  Type message and press Enter",
+        "  ESC - Exit chat mode",
+        "",
+        "AI Settings (Environment Variables):",
+        "  AI_PROVIDER - openai/anthropic",
+        "  AI_API_KEY  - Your API key",
+        "  AI_MODEL    - Model name (optional)",
+        "",
+        "Press any key to return...",
+    )
     
     def __init__(self):
         """初始化UI"""
@@ -59,7 +142,8 @@ class GomokuUI:
         self.chat_enabled = False
         self.chat_start_x = 40
         self.chat_width = 38
-        self.chat_messages: List[Tuple[str, List[str]]] = []  # [(role, lines), ...]
+        self.chat_messages: Deque[Tuple[int, List[str]]] = deque(maxlen=self.CHAT_MAX_MESSAGES)  # [(ROLE_*, lines), ...]
+        self._flat_lines: Deque[Tuple[str, int]] = deque(maxlen=self.CHAT_MAX_LINES)  # 展开后的 (行文本, 颜色)
         self.chat_scroll = 0
         self.chat_input_buffer = ""
         self.input_mode = InputMode.GAME
@@ -68,6 +152,15 @@ class GomokuUI:
         # 窗口尺寸
         self.term_height = 0
         self.term_width = 0
+        self._size_dirty = True  # 需要重新读取窗口尺寸（初始化或收到 KEY_RESIZE）
+        
+        # 棋盘格子的影子缓冲：[row][col] -> 上次写入屏幕的 (符号, 属性)，只重绘变化的格子
+        self._cell_shadow = [[None] * Board.SIZE for _ in range(Board.SIZE)]
+        self._force_full = True  # 下一帧需要清屏并完整重绘（初始化、窗口大小变化、帮助界面之后）
+        self._dirty = True  # 界面状态（光标、聊天记录、输入模式等）在上次绘制后有变化
+        self._chat_dirty = True  # 聊天区域（消息、输入内容、AI输入状态、输入模式）需要重绘
+        self._input_cursor = None  # 聊天模式下硬件光标停放的位置 (y, x)
+        self._chat_win = None  # 聊天区域的独立窗口，窗口大小变化时重建
     
     def init(self):
         """初始化curses"""
@@ -90,15 +183,72 @@ class GomokuUI:
         curses.init_pair(self.COLOR_CHAT_AI, curses.COLOR_MAGENTA, curses.COLOR_BLACK)
         curses.init_pair(self.COLOR_CHAT_BORDER, curses.COLOR_BLUE, curses.COLOR_BLACK)
         curses.init_pair(self.COLOR_INPUT, curses.COLOR_YELLOW, curses.COLOR_BLACK)
+        # 光标停在棋子上：用红色背景标出，不再叠加下划线和反显
+        curses.init_pair(self.COLOR_CURSOR_ON_BLACK, curses.COLOR_BLACK, curses.COLOR_RED)
+        curses.init_pair(self.COLOR_CURSOR_ON_WHITE, curses.COLOR_WHITE, curses.COLOR_RED)
+        
+        # 空白格子使用棋盘配色，clear/clrtoeol 清出的区域与文字背景一致
+        self.stdscr.bkgdset(' ', curses.color_pair(self.COLOR_BOARD))
+        
+        # 初始化Unicode支持（边框字符取决于它，需在检测窗口大小之前）
+        self._init_unicode()
         
         # 检测窗口大小
         self._update_window_size()
         
-        # 初始化Unicode支持
-        self._init_unicode()
+        # 行列标签只取决于棋盘大小
+        self._col_labels_str = "   " + " ".join(self._COL_LETTERS)
+        self._row_labels = [f"{r + 1:2d} " for r in range(Board.SIZE)]
+        
+        # 常用属性值只计算一次
+        self._attr_board = curses.color_pair(self.COLOR_BOARD)
+        self._attr_border = curses.color_pair(self.COLOR_CHAT_BORDER)
+        self._attr_table = self._build_attr_table()
+        self._help_pad = self._build_help_pad()
         
         self.stdscr.clear()
     
+    def _build_attr_table(self):
+        """
+        预先计算棋盘格子的显示方式（需在颜色对和棋子符号确定之后调用）
+        
+        Returns:
+            (符号, 属性) 列表，共 3×2×2 种组合，下标见 _cell_index
+        """
+        bold = curses.A_BOLD
+        cursor_pairs = {
+            Board.BLACK: self.COLOR_CURSOR_ON_BLACK,
+            Board.WHITE: self.COLOR_CURSOR_ON_WHITE,
+        }
+        stones = {
+            Board.EMPTY: (self.SYMBOL_EMPTY, self.COLOR_BOARD),
+            Board.BLACK: (self.SYMBOL_BLACK, self.COLOR_BLACK),
+            Board.WHITE: (self.SYMBOL_WHITE, self.COLOR_WHITE),
+        }
+        
+        table = [None] * (len(stones) * 4)
+        for stone, (symbol, pair) in stones.items():
+            for is_cursor in (False, True):
+                for is_last in (False, True):
+                    if stone == Board.EMPTY:
+                        if is_cursor:
+                            cell = (self.SYMBOL_CURSOR, curses.color_pair(self.COLOR_CURSOR) | bold)
+                        else:
+                            cell = (symbol, curses.color_pair(pair))
+                    elif is_cursor:
+                        cell = (symbol, curses.color_pair(cursor_pairs[stone]) | bold)
+                    elif is_last:
+                        cell = (symbol, curses.color_pair(self.COLOR_LAST_MOVE) | bold)
+                    else:
+                        cell = (symbol, curses.color_pair(pair) | bold)
+                    table[self._cell_index(stone, is_cursor, is_last)] = cell
+        return table
+    
+    @staticmethod
+    def _cell_index(stone, is_cursor, is_last):
+        """格子显示方式在 _attr_table 中的下标（用整数下标代替元组键，查表时不必构造和哈希元组）"""
+        return stone << 2 | is_cursor << 1 | is_last
+    
     def _init_unicode(self):
         """初始化Unicode支持"""
         try:
@@ -120,11 +270,21 @@ class GomokuUI:
             self.SYMBOL_CURSOR = '#'
     
     def _update_window_size(self):
-        """更新窗口尺寸"""
+        """
+        更新窗口尺寸
+        
+        Returns:
+            窗口尺寸是否发生变化
+        """
+        # 终端大小只在收到 KEY_RESIZE 后才会变化
+        if not self._size_dirty:
+            return False
+        self._size_dirty = False
+        
+        old_size = (self.term_height, self.term_width)
         self.term_height, self.term_width = self.stdscr.getmaxyx()
         
         # 动态计算棋盘实际宽度: 行标签(3字符) + 棋盘列数 * 2
-        from .board import Board
         board_width = 3 + Board.SIZE * 2  # 25x25棋盘 = 3 + 50 = 53
         remaining_width = self.term_width - board_width - 2
         
@@ -134,6 +294,65 @@ class GomokuUI:
             self.chat_width = min(remaining_width, self.CHAT_MAX_WIDTH)
         else:
             self.chat_enabled = False
+        
+        changed = (self.term_height, self.term_width) != old_size
+        if changed:
+            self._build_chat_borders()
+            self._create_chat_window()
+        return changed
+    
+    def _create_chat_window(self):
+        """
+        按当前聊天区域位置创建独立窗口（从第1行开始，含边框共 Board.SIZE + 4 行）
+        
+        聊天区域和棋盘分属不同窗口，curses 分别记录各自的修改，
+        聊天内容不变时 noutrefresh 不会再比较这一块
+        """
+        self._chat_win = None
+        if not self.chat_enabled:
+            return
+        
+        height = min(Board.SIZE + 4, self.term_height - 1)
+        if height <= 0:
+            return
+        try:
+            self._chat_win = curses.newwin(height, self.chat_width, 1, self.chat_start_x)
+        except curses.error:
+            return
+        self._chat_win.bkgdset(' ', curses.color_pair(self.COLOR_BOARD))
+    
+    def _build_chat_borders(self):
+        """预先拼好聊天区域的边框字符串，只在窗口大小变化时重建"""
+        if self.use_unicode:
+            border_h = "─"
+            border_v = "│"
+            corner_tl = "┌"
+            corner_tr = "┐"
+            corner_bl = "└"
+            corner_br = "┘"
+            tee_l = "├"
+            tee_r = "┤"
+        else:
+            border_h = "-"
+            border_v = "|"
+            corner_tl = "+"
+            corner_tr = "+"
+            corner_bl = "+"
+            corner_br = "+"
+            tee_l = "+"
+            tee_r = "+"
+        
+        inner = border_h * (self.chat_width - 2)
+        self._border_v = border_v
+        self._top_border = corner_tl + inner + corner_tr
+        self._sep_line = tee_l + inner + tee_r
+        self._bottom_border = corner_bl + inner + corner_br
+    
+    def handle_resize(self):
+        """处理 KEY_RESIZE：重新计算窗口尺寸和聊天区域，尺寸变化时下一帧完整重绘"""
+        self._size_dirty = True
+        if self._update_window_size():
+            self._force_full = True
     
     def cleanup(self):
         """清理curses"""
@@ -143,21 +362,87 @@ class GomokuUI:
             curses.echo()
             curses.endwin()
     
-    def safe_addstr(self, y, x, text, attr=0):
-        """安全地添加字符串"""
+    def safe_addstr(self, y, x, text, attr=0, win=None):
+        """
+        安全地添加字符串
+        
+        Args:
+            win: 目标窗口，默认 stdscr；坐标相对于该窗口
+        """
         try:
-            if y >= 0 and y < self.term_height and x >= 0:
-                max_len = self.term_width - x
+            if win is None:
+                win = self.stdscr
+                height, width = self.term_height, self.term_width
+            else:
+                height, width = win.getmaxyx()
+            if y >= 0 and y < height and x >= 0:
+                max_len = width - x
                 if max_len > 0:
-                    self.stdscr.addstr(y, x, text[:max_len], attr)
+                    win.addstr(y, x, text[:max_len], attr)
         except curses.error:
             pass
     
+    def clear_line(self, y):
+        """清除整行（curses 原生清除到行尾，不再写入整行空格）"""
+        if 0 <= y < self.term_height:
+            try:
+                self.stdscr.move(y, 0)
+                self.stdscr.clrtoeol()
+            except curses.error:
+                pass
+    
     def draw_board(self, board, last_move=None):
-        """绘制棋盘"""
-        self.stdscr.clear()
-        self._update_window_size()
+        """
+        绘制棋盘
+        
+        只在第一帧、窗口大小变化或帮助界面之后清屏并绘制静态部分；
+        其余帧只重绘内容变化的格子，以及状态栏下方的动态文字
+        """
+        size = board.SIZE
         
+        if self._update_window_size() or self._force_full:
+            self._chat_dirty = True
+            self.stdscr.clear()
+            self._cell_shadow = [[None] * size for _ in range(size)]
+            self._force_full = False
+            self._draw_board_frame(board)
+        elif size + 5 < self.term_height:
+            # 清除状态栏以下的所有动态文字（状态、提示、操作说明、聊天输入行），聊天区域不延伸到这里
+            try:
+                self.stdscr.move(size + 5, 0)
+                self.stdscr.clrtobot()
+            except curses.error:
+                pass
+        
+        # 绘制棋盘：逐行比较影子缓冲，只重写有变化的行
+        # 大多数格子既不是光标也不是最后一步，先按棋子直接取值，再单独修正这两个格子
+        table = self._attr_table
+        plain = table[::4]  # 按棋子下标取值
+        shadow_rows = self._cell_shadow
+        draw_row = self._draw_row
+        cursor_row, cursor_col = self.cursor_row, self.cursor_col
+        last_row, last_col = last_move[:2] if last_move else (-1, -1)
+        for row, stones in enumerate(board.board):
+            cells = list(map(plain.__getitem__, stones))
+            if row == last_row:
+                cells[last_col] = table[stones[last_col] << 2 | 1]
+            if row == cursor_row:
+                is_last = row == last_row and cursor_col == last_col
+                cells[cursor_col] = table[stones[cursor_col] << 2 | 2 | is_last]
+            shadow = shadow_rows[row]
+            if cells != shadow:
+                draw_row(row, cells, shadow)
+                shadow_rows[row] = cells
+        
+        # 绘制聊天区域（内容没有变化时跳过）
+        if self._chat_win is not None and self._chat_dirty:
+            self._draw_chat_area(size)
+            self._chat_dirty = False
+        
+        self._dirty = False
+    
+    def _draw_board_frame(self, board):
+        """绘制清屏后不再变化的部分：标题、行列标签和状态栏分隔线"""
         # 标题
         title = "=== Terminal Gomoku - VS AI ==="
         if self.chat_enabled:
@@ -165,238 +450,212 @@ class GomokuUI:
         self.safe_addstr(0, 2, title, curses.color_pair(self.COLOR_TITLE) | curses.A_BOLD)
         
         # 列标签 (A-O)
-        col_labels = "   " + " ".join([chr(65 + i) for i in range(board.SIZE)])
-        self.safe_addstr(2, 0, col_labels, curses.color_pair(self.COLOR_BOARD))
+        self.safe_addstr(2, 0, self._col_labels_str, self._attr_board)
         
-        # 绘制棋盘
-        for row in range(board.SIZE):
-            row_label = f"{row + 1:2d} "
-            self.safe_addstr(3 + row, 0, row_label, curses.color_pair(self.COLOR_BOARD))
-            
-            for col in range(board.SIZE):
-                stone = board.get_stone(row, col)
-                x_pos = 3 + col * 2
-                y_pos = 3 + row
-                
-                is_cursor = (row == self.cursor_row and col == self.cursor_col)
-                is_last = (last_move and last_move[0] == row and last_move[1] == col)
-                
-                if is_cursor:
-                    if stone == board.EMPTY:
-                        symbol = self.SYMBOL_CURSOR
-                        color = curses.color_pair(self.COLOR_CURSOR) | curses.A_BOLD
-                    elif stone == board.BLACK:
-                        symbol = self.SYMBOL_BLACK
-                        color = curses.color_pair(self.COLOR_BLACK) | curses.A_BOLD | curses.A_UNDERLINE | curses.A_STANDOUT
-                    elif stone == board.WHITE:
-                        symbol = self.SYMBOL_WHITE
-                        color = curses.color_pair(self.COLOR_WHITE) | curses.A_BOLD | curses.A_UNDERLINE | curses.A_STANDOUT
-                elif stone == board.BLACK:
-                    symbol = self.SYMBOL_BLACK
-                    if is_last:
-                        color = curses.color_pair(self.COLOR_LAST_MOVE) | curses.A_BOLD
-                    else:
-                        color = curses.color_pair(self.COLOR_BLACK) | curses.A_BOLD
-                elif stone == board.WHITE:
-                    symbol = self.SYMBOL_WHITE
-                    if is_last:
-                        color = curses.color_pair(self.COLOR_LAST_MOVE) | curses.A_BOLD
-                    else:
-                        color = curses.color_pair(self.COLOR_WHITE) | curses.A_BOLD
-                else:
-                    symbol = self.SYMBOL_EMPTY
-                    color = curses.color_pair(self.COLOR_BOARD)
-                
-                self.safe_addstr(y_pos, x_pos, symbol, color)
+        # 行标签
+        for row, row_label in enumerate(self._row_labels):
+            self.safe_addstr(3 + row, 0, row_label, self._attr_board)
         
         # 状态栏
         status_y = board.SIZE + 4
-        self.safe_addstr(status_y, 0, "-" * 35, curses.color_pair(self.COLOR_BOARD))
-        
-        # 绘制聊天区域
-        if self.chat_enabled:
-            self._draw_chat_area(board.SIZE)
+        self.safe_addstr(status_y, 0, "-" * 35, self._attr_board)
+    
+    def _draw_row(self, row, cells, shadow):
+        """
+        重写一行中从第一个到最后一个变化格子之间的部分
+        
+        相邻且属性相同的格子合并为一次写入（格子间的空格一并写出），
+        全空的一行只需一次 addstr
+        
+        Args:
+            row: 行号
+            cells: 该行每个格子的 (符号, 属性)
+            shadow: 该行上次写入屏幕的内容
+        """
+        changed = [col for col, cell in enumerate(cells) if cell != shadow[col]]
+        end = changed[-1] + 1
+        y_pos = 3 + row
+        addstr = self.safe_addstr
+        
+        col = changed[0]
+        while col < end:
+            attr = cells[col][1]
+            start = col
+            col += 1
+            while col < end and cells[col][1] == attr:
+                col += 1
+            text = " ".join([cells[i][0] for i in range(start, col)])
+            addstr(y_pos, 3 + start * 2, text, attr)
+    
+    def _draw_cell(self, board, row, col, last_move=None):
+        """绘制棋盘上的单个格子"""
+        stone = board.get_stone(row, col)
+        x_pos = 3 + col * 2
+        y_pos = 3 + row
+        
+        is_cursor = (row == self.cursor_row and col == self.cursor_col)
+        is_last = bool(last_move) and last_move[0] == row and last_move[1] == col
+        symbol, color = self._attr_table[self._cell_index(stone, is_cursor, is_last)]
+        
+        # 与屏幕上已有内容相同则跳过
+        if self._cell_shadow[row][col] == (symbol, color):
+            return
+        self._cell_shadow[row][col] = (symbol, color)
+        self.safe_addstr(y_pos, x_pos, symbol, color)
+    
+    def draw_cursor_move(self, old_pos, board, last_move=None):
+        """光标移动后只重绘旧位置和新位置两个格子
+        
+        Args:
+            old_pos: 移动前的光标位置 (row, col)
+            board: Board对象
+            last_move: 最后一步落子位置 (row, col)
+        """
+        old_row, old_col = old_pos
+        self._draw_cell(board, old_row, old_col, last_move)
+        self._draw_cell(board, self.cursor_row, self.cursor_col, last_move)
+        self._dirty = False
     
     def _draw_chat_area(self, board_size: int):
-        """绘制聊天区域"""
-        chat_height = board_size + 5
-        
-        # 定义边框字符
-        if self.use_unicode:
-            border_h = "─"
-            border_v = "│"
-            corner_tl = "┌"
-            corner_tr = "┐"
-            corner_bl = "└"
-            corner_br = "┘"
-            tee_l = "├"
-            tee_r = "┤"
-        else:
-            border_h = "-"
-            border_v = "|"
-            corner_tl = "+"
-            corner_tr = "+"
-            corner_bl = "+"
-            corner_br = "+"
-            tee_l = "+"
-            tee_r = "+"
+        """绘制聊天区域（写入聊天窗口，坐标相对于窗口左上角）"""
+        win = self._chat_win
+        addstr = self.safe_addstr
+        right_x = self.chat_width - 1
+        border_v = self._border_v
         
-        msg_area_height = chat_height - 5
+        msg_area_height = board_size
         
-        # 第一步：清除整个聊天区域（使用 clrtoeol）
-        for i in range(msg_area_height + 4):  # +4 包括标题、分隔线、输入行、底边框
-            y = 1 + i
-            try:
-                self.stdscr.move(y, self.chat_start_x)
-                self.stdscr.clrtoeol()
-            except curses.error:
-                pass
+        # 第一步：清除整个聊天窗口
+        win.erase()
         
         # 第二步：绘制消息内容
         self._draw_chat_messages(msg_area_height)
         
         # 第三步：绘制输入区域内容
-        input_y = 2 + msg_area_height + 1  # 分隔线下面一行
+        input_y = msg_area_height + 2  # 分隔线下面一行
         if self.ai_typing:
             prompt = " AI typing..."
-            self.safe_addstr(input_y, self.chat_start_x + 1, prompt, curses.color_pair(self.COLOR_CHAT_AI))
+            addstr(input_y, 1, prompt, curses.color_pair(self.COLOR_CHAT_AI), win)
         elif self.input_mode == InputMode.CHAT:
+            # 不再画闪烁的 "_"：聊天模式下由终端的硬件光标指示输入位置（见 set_input_cursor）
             prompt = "> "
-            prompt_width = 2
             max_input_width = self.chat_width - 4
             
             display_text = self.chat_input_buffer
             current_width = 0
             start_index = len(display_text)
             for i in range(len(display_text) - 1, -1, -1):
-                char_width = self._get_char_width(display_text[i])
-                if current_width + char_width > max_input_width:
+                cw = char_width(display_text[i])
+                if current_width + cw > max_input_width:
                     break
-                current_width += char_width
+                current_width += cw
                 start_index = i
             
             display_text = display_text[start_index:]
-            self.safe_addstr(input_y, self.chat_start_x + 1, prompt + display_text, curses.color_pair(self.COLOR_INPUT) | curses.A_BOLD)
-            
-            cursor_x = self.chat_start_x + 1 + prompt_width + current_width
-            if cursor_x < self.chat_start_x + self.chat_width - 1:
-                self.safe_addstr(input_y, cursor_x, "_", curses.color_pair(self.COLOR_INPUT) | curses.A_BLINK)
+            addstr(input_y, 1, prompt + display_text, curses.color_pair(self.COLOR_INPUT) | curses.A_BOLD, win)
         else:
             hint = " Press C to chat"
-            self.safe_addstr(input_y, self.chat_start_x + 1, hint, curses.color_pair(self.COLOR_BOARD))
+            addstr(input_y, 1, hint, self._attr_board, win)
         
         # 第四步：最后绘制所有边框（确保不被内容覆盖）
         # 顶部边框
-        top_border = corner_tl + border_h * (self.chat_width - 2) + corner_tr
-        self.safe_addstr(1, self.chat_start_x, top_border, curses.color_pair(self.COLOR_CHAT_BORDER))
+        addstr(0, 0, self._top_border, self._attr_border, win)
         
         # 标题（覆盖部分顶部边框）
         chat_title = " 💬 AI Chat " if self.use_unicode else " AI Chat "
-        title_x = self.chat_start_x + (self.chat_width - len(chat_title)) // 2
-        self.safe_addstr(1, title_x, chat_title, curses.color_pair(self.COLOR_TITLE) | curses.A_BOLD)
+        title_x = (self.chat_width - len(chat_title)) // 2
+        addstr(0, title_x, chat_title, curses.color_pair(self.COLOR_TITLE) | curses.A_BOLD, win)
         
         # 左右边框
-        for i in range(msg_area_height):
-            y = 2 + i
-            self.safe_addstr(y, self.chat_start_x, border_v, curses.color_pair(self.COLOR_CHAT_BORDER))
-            self.safe_addstr(y, self.chat_start_x + self.chat_width - 1, border_v, curses.color_pair(self.COLOR_CHAT_BORDER))
+        for y in range(1, msg_area_height + 1):
+            addstr(y, 0, border_v, self._attr_border, win)
+            addstr(y, right_x, border_v, self._attr_border, win)
         
         # 分隔线
-        sep_y = 2 + msg_area_height
-        sep_line = tee_l + border_h * (self.chat_width - 2) + tee_r
-        self.safe_addstr(sep_y, self.chat_start_x, sep_line, curses.color_pair(self.COLOR_CHAT_BORDER))
+        addstr(msg_area_height + 1, 0, self._sep_line, self._attr_border, win)
         
         # 输入区域边框
-        self.safe_addstr(input_y, self.chat_start_x, border_v, curses.color_pair(self.COLOR_CHAT_BORDER))
-        self.safe_addstr(input_y, self.chat_start_x + self.chat_width - 1, border_v, curses.color_pair(self.COLOR_CHAT_BORDER))
-        
-        # 底部边框
-        bottom_border = corner_bl + border_h * (self.chat_width - 2) + corner_br
-        self.safe_addstr(input_y + 1, self.chat_start_x, bottom_border, curses.color_pair(self.COLOR_CHAT_BORDER))
-    
-    def _get_char_width(self, char):
-        """获取字符的显示宽度"""
-        import unicodedata
-        # 'F' (Fullwidth), 'W' (Wide), 'A' (Ambiguous) 通常视为2
-        # 'N' (Neutral), 'Na' (Narrow), 'H' (Halfwidth) 视为1
-        # 注意：Ambiguous 在某些终端可能是1，但在中文环境通常是2
-        w = unicodedata.east_asian_width(char)
-        return 2 if w in ('F', 'W', 'A') else 1
-
-    def _truncate_text(self, text, max_width):
-        """按显示宽度截断文本"""
-        width = 0
-        result = ""
-        for char in text:
-            char_width = self._get_char_width(char)
-            if width + char_width > max_width:
-                break
-            width += char_width
-            result += char
-        return result, width
-
+        addstr(input_y, 0, border_v, self._attr_border, win)
+        addstr(input_y, right_x, border_v, self._attr_border, win)
+        
+        # 底部边框（窗口右下角写入后 curses 会报错，由 safe_addstr 忽略）
+        addstr(input_y + 1, 0, self._bottom_border, self._attr_border, win)
+    
     def _draw_chat_messages(self, area_height: int):
         """绘制聊天消息"""
         if not self.chat_messages:
             # 显示欢迎消息
             welcome = "Start chatting!"
-            y = 2 + area_height // 2
-            x = self.chat_start_x + (self.chat_width - len(welcome)) // 2
-            self.safe_addstr(y, x, welcome, curses.color_pair(self.COLOR_BOARD))
+            y = 1 + area_height // 2
+            x = (self.chat_width - len(welcome)) // 2
+            self.safe_addstr(y, x, welcome, self._attr_board, self._chat_win)
             return
         
-        # 收集所有要显示的行
-        all_lines = []
-        for role, lines in self.chat_messages:
-            prefix = "You: " if role == "user" else "AI: "
-            color = self.COLOR_CHAT_USER if role == "user" else self.COLOR_CHAT_AI
-            
-            for i, line in enumerate(lines):
-                if i == 0:
-                    all_lines.append((prefix + line, color))
-                else:
-                    all_lines.append(("    " + line, color))
-        
-        # 计算显示范围（从底部往上显示）
-        total_lines = len(all_lines)
+        # 计算显示范围（从底部往上显示），展开后的行在消息变化时已维护好
+        total_lines = len(self._flat_lines)
         start_idx = max(0, total_lines - area_height + self.chat_scroll)
         end_idx = min(total_lines, start_idx + area_height)
         
-        # 绘制消息
-        display_lines = all_lines[start_idx:end_idx]
+        # 绘制消息（窗口已整体擦除，不必再用空格补齐行尾）
+        win = self._chat_win
+        max_len = self.chat_width - 3  # 边框内的可用宽度
+        display_lines = itertools.islice(self._flat_lines, start_idx, end_idx)
         for i, (line, color) in enumerate(display_lines):
-            y = 2 + i
-            x = self.chat_start_x + 1
-            max_len = self.chat_width - 3  # 边框内的可用宽度
-            
             # 使用宽度感知的截断
-            display_text, text_width = self._truncate_text(line, max_len)
-            
-            # 绘制文本
-            self.safe_addstr(y, x, display_text, curses.color_pair(color))
-            
-            # 清除剩余的空间（非常重要，否则会有残留）
-            remaining_space = max_len - text_width
-            if remaining_space > 0:
-                self.safe_addstr(y, x + text_width, " " * remaining_space, curses.color_pair(self.COLOR_BOARD))
+            display_text, _ = truncate_to_cols(line, max_len)
+            self.safe_addstr(1 + i, 1, display_text, curses.color_pair(color), win)
+    
+    def _flatten_message(self, role: int, lines: List[str]):
+        """把一条消息展开为带前缀的显示行，追加到 _flat_lines"""
+        prefix, color = self._ROLE_TABLE[role]
+        
+        if not lines:
+            return
+        first, *rest = lines
+        self._flat_lines.append((prefix + first, color))
+        self._flat_lines.extend(("    " + line, color) for line in rest)
     
     def update_chat_messages(self, messages: List[Tuple[str, List[str]]]):
         """更新聊天消息"""
-        self.chat_messages = messages
+        self.chat_messages = deque(
+            ((ROLE_USER if role == "user" else ROLE_AI, lines) for role, lines in messages),
+            maxlen=self.CHAT_MAX_MESSAGES,
+        )
+        self._flat_lines.clear()
+        for role, lines in self.chat_messages:
+            self._flatten_message(role, lines)
         self.chat_scroll = 0  # 重置滚动
+        self._dirty = True
+        self._chat_dirty = True
     
     def add_chat_message(self, role: str, lines: List[str]):
         """添加单条聊天消息"""
+        role = ROLE_USER if role == "user" else ROLE_AI
         self.chat_messages.append((role, lines))
+        self._flatten_message(role, lines)
         self.chat_scroll = 0
+        self._dirty = True
+        self._chat_dirty = True
     
     def set_ai_typing(self, typing: bool):
         """设置AI正在输入状态"""
-        self.ai_typing = typing
+        if typing != self.ai_typing:
+            self.ai_typing = typing
+            self._dirty = True
+            self._chat_dirty = True
     
     def set_input_mode(self, mode: InputMode):
         """设置输入模式"""
         self.input_mode = mode
+        self._dirty = True
+        self._chat_dirty = True
+        
+        # 聊天模式显示终端自带的光标（闪烁由终端处理），游戏模式隐藏
+        try:
+            curses.curs_set(1 if mode == InputMode.CHAT else 0)
+        except curses.error:
+            pass
+        
         if mode == InputMode.CHAT:
             # 聊天模式：使用阻塞式输入，避免刷新干扰打字
             self.stdscr.timeout(-1)
@@ -404,6 +663,7 @@ class GomokuUI:
             # 游戏模式：恢复非阻塞输入
             self.stdscr.timeout(100)
             self.chat_input_buffer = ""
+            self._input_cursor = None
     
     def get_input_mode(self) -> InputMode:
         """获取当前输入模式"""
@@ -414,11 +674,15 @@ class GomokuUI:
         max_len = 200  # 最大输入长度
         if len(self.chat_input_buffer) < max_len:
             self.chat_input_buffer += char
+            self._dirty = True
+            self._chat_dirty = True
     
     def backspace_chat_input(self):
         """删除聊天输入的最后一个字符"""
         if self.chat_input_buffer:
             self.chat_input_buffer = self.chat_input_buffer[:-1]
+            self._dirty = True
+            self._chat_dirty = True
     
     def get_chat_input(self) -> str:
         """获取并清空聊天输入"""
@@ -428,19 +692,16 @@ class GomokuUI:
     
     def clear_chat_input(self):
         """清空聊天输入"""
-        self.chat_input_buffer = ""
+        if self.chat_input_buffer:
+            self.chat_input_buffer = ""
+            self._dirty = True
+            self._chat_dirty = True
     
     def draw_status(self, game_state):
         """绘制状态信息"""
-        difficulty_text = {
-            'easy': 'Easy',
-            'medium': 'Medium',
-            'hard': 'Hard',
-            'ai': 'AI'
-        }.get(game_state.get('difficulty', 'medium'), 'Medium')
+        difficulty_text = self._DIFFICULTY_TEXT.get(game_state.get('difficulty', 'medium'), 'Medium')
         
-        cursor_col_label = chr(65 + self.cursor_col) if self.cursor_col < 26 else '?'
-        cursor_pos = f"({cursor_col_label}{self.cursor_row + 1})"
+        cursor_pos = f"({self._COL_LETTERS[self.cursor_col]}{self.cursor_row + 1})"
         
         # AI提供商信息
         ai_provider = game_state.get('ai_provider', '')
@@ -455,7 +716,6 @@ class GomokuUI:
         else:
             status_line += "Current: AI(○)" if self.use_unicode else "Current: AI(O)"
         
-        from .board import Board
         status_y = Board.SIZE + 5
         self.safe_addstr(status_y, 0, status_line[:35], curses.color_pair(self.COLOR_TITLE))
         
@@ -467,7 +727,6 @@ class GomokuUI:
     
     def draw_controls(self):
         """绘制操作说明"""
-        from .board import Board
         controls_y = Board.SIZE + 8
         
         if self.input_mode == InputMode.CHAT:
@@ -482,48 +741,39 @@ class GomokuUI:
             ]
         
         for i, text in enumerate(controls):
-            self.safe_addstr(controls_y + i, 0, text[:35], curses.color_pair(self.COLOR_BOARD))
+            self.safe_addstr(controls_y + i, 0, text[:35], self._attr_board)
+    
+    def _build_help_pad(self):
+        """帮助界面是静态的：在 init() 中一次写入 pad，之后每次显示只需刷新 pad"""
+        width = 2 + max(len(line) for line in self._HELP_TEXT) + 1
+        pad = curses.newpad(len(self._HELP_TEXT) + 1, width)
+        pad.bkgdset(' ', self._attr_board)
+        title_attr = curses.color_pair(self.COLOR_TITLE)
+        for i, line in enumerate(self._HELP_TEXT):
+            pad.addstr(i, 2, line, title_attr if i < 3 else self._attr_board)
+        return pad
     
     def draw_help(self):
         """绘制帮助信息"""
         self.stdscr.clear()
+        self._force_full = True  # 帮助覆盖了整个屏幕，返回后完整重绘
+        self.stdscr.noutrefresh()
         
-        help_text = [
-            "=======================================",
-            "        Gomoku Game Help",
-            "=======================================",
-            "",
-            "Goal:",
-            "  Form 5 consecutive stones in a row",
-            "",
-            "Controls:",
-            "  Arrow Keys/WASD - Move cursor",
-            "  Enter/Space     - Place stone",
-            "  C - Open chat with AI",
-            "  Q - Quit game",
-            "  R - Restart",
-            "  H - Show/Hide help",
-            "",
-            "Chat Mode:",
-            "  Type message and press Enter",
-            "  ESC - Exit chat mode",
-            "",
-            "AI Settings (Environment Variables):",
-            "  AI_PROVIDER - openai/anthropic",
-            "  AI_API_KEY  - Your API key",
-            "  AI_MODEL    - Model name (optional)",
-            "",
-            "Press any key to return...",
-        ]
-        
-        for i, line in enumerate(help_text):
-            color = curses.color_pair(self.COLOR_TITLE) if i < 3 else curses.color_pair(self.COLOR_BOARD)
-            self.safe_addstr(i, 2, line, color)
-        
-        self.stdscr.refresh()
-        self.stdscr.timeout(-1)  # 阻塞等待
+        pad_height, pad_width = self._help_pad.getmaxyx()
+        bottom = min(pad_height, self.term_height) - 1
+        right = min(pad_width, self.term_width) - 1
+        if bottom >= 0 and right >= 0:
+            try:
+                self._help_pad.noutrefresh(0, 0, 0, 0, bottom, right)
+            except curses.error:
+                pass
+        curses.doupdate()
+    
+    def show_help_modal(self):
+        """显示帮助信息，阻塞等待任意键后返回（游戏主循环使用阻塞输入）"""
+        self.draw_help()
+        self.stdscr.timeout(-1)
         self.stdscr.getch()
-        self.stdscr.timeout(100)  # 恢复非阻塞
     
     def draw_game_over(self, winner, board):
         """绘制游戏结束界面"""
@@ -540,9 +790,10 @@ class GomokuUI:
             msg = "Draw!"
         
         self.safe_addstr(y_pos + 1, 2, msg, curses.color_pair(self.COLOR_CURSOR) | curses.A_BOLD)
-        self.safe_addstr(y_pos + 2, 2, "R-Restart Q-Quit", curses.color_pair(self.COLOR_BOARD))
+        self.safe_addstr(y_pos + 2, 2, "R-Restart Q-Quit", self._attr_board)
         
-        self.stdscr.refresh()
+        # 由调用方 commit() 统一输出
+        self.stdscr.noutrefresh()
     
     def get_input(self):
         """获取用户输入"""
@@ -565,6 +816,7 @@ class GomokuUI:
             self.cursor_col = max(0, self.cursor_col - 1)
         elif direction == 'right':
             self.cursor_col = min(board_size - 1, self.cursor_col + 1)
+        self._dirty = True
     
     def get_cursor_position(self):
         """获取当前光标位置"""
@@ -579,12 +831,35 @@ class GomokuUI:
         """刷新屏幕"""
         self.stdscr.refresh()
     
+    def commit(self):
+        """
+        输出本帧的全部绘制
+        
+        各 draw_* 只修改虚拟屏幕，每帧最后调用一次，由 curses
+        对物理屏幕只计算一次差异并输出；聊天模式下最后把光标停在输入位置
+        """
+        # stdscr 在前：它清屏时覆盖的聊天区域随后由聊天窗口补上
+        self.stdscr.noutrefresh()
+        if self._chat_win is not None:
+            self._chat_win.noutrefresh()
+        if self.input_mode == InputMode.CHAT and self._input_cursor is not None:
+            # 物理光标默认停在最后 noutrefresh 的窗口里，这里直接指定屏幕坐标
+            curses.setsyx(*self._input_cursor)
+        curses.doupdate()
+    
+    def set_input_cursor(self, y: int, x: int):
+        """设置聊天输入时硬件光标的位置，下次 commit() 生效"""
+        self._input_cursor = (y, x)
+    
     def show_ai_thinking(self, message: str = "AI thinking..."):
         """显示AI思考中"""
-        from .board import Board
         msg_y = Board.SIZE + 6
         self.safe_addstr(msg_y, 0, message[:35], curses.color_pair(self.COLOR_CURSOR) | curses.A_BOLD)
-        self.stdscr.refresh()
+        self.stdscr.noutrefresh()
+    
+    def needs_redraw(self) -> bool:
+        """界面状态在上次 draw_board / draw_cursor_move 之后是否有变化"""
+        return self._dirty
     
     def is_chat_enabled(self) -> bool:
         """检查聊天功能是否启用"""
@@ -592,6 +867,9 @@ class GomokuUI:
     
     def clear_chat(self):
         """清空聊天消息"""
-        self.chat_messages = []
+        self.chat_messages.clear()
+        self._flat_lines.clear()
         self.chat_scroll = 0
         self.chat_input_buffer = ""
+        self._dirty = True
+        self._chat_dirty = True
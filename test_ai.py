@@ -58,6 +58,55 @@ def test_ai(difficulty):
     print(f"\n✓ {difficulty.upper()} 难度 AI 运行正常")
 
 
+def _setup_position():
+    """构造一个中局局面（无一步必胜/必防，hard 难度会进入 Minimax 搜索）"""
+    board = Board()
+    for row, col, player in [(7, 7, Board.BLACK), (7, 8, Board.WHITE),
+                             (8, 8, Board.BLACK), (6, 6, Board.WHITE),
+                             (8, 6, Board.BLACK), (9, 9, Board.WHITE)]:
+        board.place_stone(row, col, player)
+    return board
+
+
+def test_undo_restores_state():
+    """测试 place_stone + undo 后哈希、历史和最后落子完全还原"""
+    board = _setup_position()
+    state = (board.hash, list(board.history), board.last_move, board.move_count)
+    
+    board.place_stone(10, 10, Board.BLACK)
+    board.place_stone(5, 5, Board.WHITE)
+    assert board.hash != state[0]
+    board.undo()
+    board.undo()
+    
+    assert (board.hash, list(board.history), board.last_move, board.move_count) == state
+    assert board.get_stone(10, 10) == Board.EMPTY and board.get_stone(5, 5) == Board.EMPTY
+    print("✓ place_stone + undo 后哈希与历史已还原")
+
+
+def test_transposition_table():
+    """测试置换表为空和预热后 get_move 结果一致，且不改动棋盘历史"""
+    board = _setup_position()
+    history = list(board.history)
+    board_hash = board.hash
+    
+    fresh_move = GomokuAI("hard").get_move(board, Board.WHITE)
+    assert board.history == history and board.hash == board_hash
+    
+    # 预热：同一个AI先在前一个局面上搜索，再搜索当前局面两次
+    warm_ai = GomokuAI("hard")
+    board.undo()
+    warm_ai.get_move(board, Board.BLACK)
+    board.place_stone(9, 9, Board.WHITE)
+    warm_ai.get_move(board, Board.WHITE)
+    assert warm_ai.tt
+    warm_move = warm_ai.get_move(board, Board.WHITE)
+    
+    assert warm_move == fresh_move, (warm_move, fresh_move)
+    assert board.history == history and board.hash == board_hash
+    print(f"✓ 置换表为空/预热后落子一致: {fresh_move}，棋盘历史未被改动")
+
+
 if __name__ == '__main__':
     print("五子棋 AI 测试")
     print("="*50)
@@ -66,6 +115,10 @@ if __name__ == '__main__':
     test_ai("medium")
     test_ai("hard")
     
+    print(f"\n{'='*50}")
+    test_undo_restores_state()
+    test_transposition_table()
+    
     print("\n" + "="*50)
     print("✅ 所有AI难度测试完成！")
     print("\n运行游戏请使用:")
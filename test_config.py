@@ -0,0 +1,86 @@
+"""
+快速测试脚本 - 测试配置文件的读取缓存（使用临时 HOME，不影响真实配置）
+"""
+
+import json
+import os
+import shutil
+import tempfile
+
+from gomoku import config
+from gomoku.config import AIConfig, AIProviderType
+
+
+def write_config(data):
+    """直接写入配置文件，并把修改时间往后推，确保与上一次写入不同"""
+    path = config.get_config_file()
+    os.makedirs(config.get_config_dir(), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_reload_after_rewrite():
+    """测试文件未变化时命中缓存，改写后重新读取"""
+    assert config.load_config_from_file() is None
+    
+    write_config({"provider": "openai", "model": "a"})
+    assert config.load_config_from_file()["model"] == "a"
+    misses = config._load_config_cached.cache_info().misses
+    assert config.load_config_from_file()["model"] == "a"
+    assert config._load_config_cached.cache_info().misses == misses
+    
+    write_config({"provider": "openai", "model": "b"})
+    assert config.load_config_from_file()["model"] == "b"
+    print("✓ 文件未变化时命中缓存，改写后重新读取")
+
+
+def test_save_and_delete_invalidate():
+    """测试 save_config_to_file / delete_config_file 会清空缓存"""
+    write_config({"provider": "openai", "model": "old"})
+    config.load_config_from_file()
+    assert config._load_config_cached.cache_info().currsize > 0
+    
+    saved = AIConfig(provider=AIProviderType.OPENAI, api_key="key", model="new")
+    assert config.save_config_to_file(saved)
+    assert config._load_config_cached.cache_info().currsize == 0
+    assert config.load_config_from_file()["model"] == "new"
+    
+    assert config.delete_config_file()
+    assert config._load_config_cached.cache_info().currsize == 0
+    assert config.load_config_from_file() is None
+    print("✓ 保存和删除配置后缓存失效")
+
+
+def test_returns_copy():
+    """测试调用方修改返回的字典不会影响缓存内容"""
+    write_config({"provider": "openai", "model": "a"})
+    first = config.load_config_from_file()
+    first["model"] = "changed"
+    first["extra"] = 1
+    assert config.load_config_from_file() == {"provider": "openai", "model": "a"}
+    print("✓ 返回的配置是副本，修改不影响缓存")
+
+
+if __name__ == '__main__':
+    print("配置缓存测试")
+    print("="*50)
+    
+    old_home = os.environ.get("HOME")
+    home = tempfile.mkdtemp()
+    os.environ["HOME"] = home
+    try:
+        config._load_config_cached.cache_clear()
+        test_reload_after_rewrite()
+        test_save_and_delete_invalidate()
+        test_returns_copy()
+    finally:
+        if old_home is None:
+            del os.environ["HOME"]
+        else:
+            os.environ["HOME"] = old_home
+        shutil.rmtree(home, ignore_errors=True)
+    
+    print("\n" + "="*50)
+    print("✅ 所有配置缓存测试完成！")
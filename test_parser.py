@@ -0,0 +1,63 @@
+"""
+快速测试脚本 - 测试AI落子响应的解析（不需要网络和SDK）
+"""
+
+from gomoku.ai_provider import ResponseParser
+
+
+def check(response, expected):
+    """解析 response 并与期望的 (row, col, reasoning) 比较"""
+    result = ResponseParser.parse_move_response(response, 20)
+    assert result == expected, f"{response!r}: 期望 {expected}，实际 {result}"
+    print(f"✓ {response!r} -> {result}")
+
+
+def test_case_insensitive():
+    """测试小写的 move: 和坐标"""
+    check("分析\nmove: h8", (7, 7, "分析"))
+    check("  Move: b2 \n推理", (1, 1, "推理"))
+
+
+def test_spaced_coordinate():
+    """测试坐标中间带空格（如 "H 8"），且推理中的其他坐标不会被误用"""
+    check("MOVE: H 8", (7, 7, ""))
+    check("分析B2不好\nMOVE: H 8", (7, 7, "分析B2不好"))
+
+
+def test_last_valid_move_wins():
+    """测试多个 MOVE 行时以最后一个有效位置为准"""
+    check("MOVE: A1\n理由\nMOVE: K10", (9, 10, "理由"))
+    # 最后一个 MOVE 无效（超出棋盘）时退回到前一个有效位置
+    check("MOVE: H8\nMOVE: Z99", (7, 7, ""))
+    check("MOVE: H8\nMOVE: U5", (7, 7, ""))
+
+
+def test_crlf():
+    """测试 \\r\\n 换行"""
+    check("先看左边\r\n再看右边\r\nMOVE: C3\r\n", (2, 2, "先看左边 再看右边"))
+
+
+def test_reasoning_stripping():
+    """测试推理内容去掉 MOVE 行、空行和首尾空白"""
+    check("\n  黑棋活三  \n\nMOVE: J10\n\n  必须封堵\n", (9, 9, "黑棋活三 必须封堵"))
+
+
+def test_invalid():
+    """测试没有任何有效位置时返回 None"""
+    check("MOVE: Z99", None)
+    check("我不确定", None)
+
+
+if __name__ == '__main__':
+    print("AI响应解析测试")
+    print("="*50)
+    
+    test_case_insensitive()
+    test_spaced_coordinate()
+    test_last_valid_move_wins()
+    test_crlf()
+    test_reasoning_stripping()
+    test_invalid()
+    
+    print("\n" + "="*50)
+    print("✅ 所有解析测试完成！")